@@ -0,0 +1,199 @@
+"""
+The document model of an album, independent of tkinter and of the image handling
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from math import radians, sin, cos
+from os.path import abspath
+from uuid import uuid4
+
+
+def rotated_size(size, angle):
+    """ the size of the bounding box of an image of the given size, rotated by angle degrees """
+    w, h = size
+    a = radians(angle)
+    return abs(w * cos(a)) + abs(h * sin(a)), abs(w * sin(a)) + abs(h * cos(a))
+
+
+def identify(content):
+    """ the placements of an album, each with its id. Placements from albums that were saved without ids are
+    identified by their position in the album """
+    return [{**c, 'uid': c.get('uid') or str(i)} for i, c in enumerate(content)]
+
+
+class Placement:
+    """ A source image placed on a page. x, y is the top left of the bounds of the image after rotation, w, h is the
+    size of the image before rotation, the angle is in degrees counter clockwise and images with a higher z are drawn
+    on top. All are in canvas pixels. The page is the index of the page of the album the image is on, the frame is the
+    rectangle of that page as left, top, right, bottom if the image was laid out on a page of a fixed size. """
+    __slots__ = ('uid', 'source', 'x', 'y', 'w', 'h', 'angle', 'z', 'page', 'frame')
+
+    def __init__(self, source, x, y, w, h, angle=0, z=0, uid=None, page=0, frame=None):
+        self.uid = uid or uuid4().hex
+        self.source = source
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.angle = angle
+        self.z = z
+        self.page = page
+        self.frame = tuple(frame) if frame is not None else None
+
+    def __repr__(self):
+        return f'Placement({self.source!r}, x={self.x}, y={self.y}, w={self.w}, h={self.h}, angle={self.angle})'
+
+    @classmethod
+    def from_dict(cls, placement, z=0):
+        """ the placement stored in an album as a dict """
+        return cls(
+            placement['image'],
+            *placement['location'][:2],
+            *placement['size'],
+            angle=placement.get('angle', 0),
+            z=z,
+            uid=placement.get('uid'),
+            page=placement.get('page', 0),
+            frame=placement.get('frame'),
+        )
+
+    def to_dict(self):
+        """ the placement as it is stored in an album """
+        return dict(
+            uid=self.uid,
+            image=abspath(self.source),
+            location=[self.x, self.y],
+            size=[self.w, self.h],
+            angle=self.angle,
+            page=self.page,
+            **({'frame': list(self.frame)} if self.frame is not None else {}),
+        )
+
+    @property
+    def size(self):
+        """ the size before rotation """
+        return self.w, self.h
+
+    @property
+    def display_size(self):
+        """ the size of the bounds after rotation """
+        return rotated_size(self.size, self.angle)
+
+    @property
+    def bbox(self):
+        """ the bounds after rotation, as left, top, right, bottom """
+        w, h = self.display_size
+        return self.x, self.y, self.x + w, self.y + h
+
+    @property
+    def centre(self):
+        """ the centre of the placement, around which it is rotated """
+        l, t, r, b = self.bbox
+        return (l + r) / 2, (t + b) / 2
+
+    @property
+    def geometry(self):
+        """ a compact tuple of x, y, w, h and angle """
+        return self.x, self.y, self.w, self.h, self.angle
+
+
+class Page:
+    """ An ordered collection of placements. The frame of a page is the rectangle of the page as left, top, right,
+    bottom, taken from the first placement that has one, or None for pages without a fixed size. """
+    __slots__ = ('name', 'placements', 'frame', '_z')
+
+    def __init__(self, name='page', placements=(), frame=None):
+        self.name = name
+        self.placements = {}
+        self.frame = frame
+        self._z = 0  # the z of the next placement
+        [self.add(p) for p in placements]
+
+    def __iter__(self):
+        """ the placements from bottom to top """
+        return iter(sorted(self.placements.values(), key=lambda p: p.z))
+
+    def __len__(self):
+        return len(self.placements)
+
+    def __getitem__(self, uid):
+        return self.placements[uid]
+
+    def add(self, placement):
+        """ add the placement on top of the others """
+        placement.z = self._z
+        self._z += 1
+        if self.frame is None:
+            self.frame = placement.frame
+        self.placements[placement.uid] = placement
+        return placement
+
+    def remove(self, placement):
+        """ remove the placement, if it is on this page """
+        self.placements.pop(placement.uid, None)
+
+    @property
+    def bounds(self):
+        """ the bounds that enclose all placements """
+        bboxes = [p.bbox for p in self.placements.values()] or [(0, 0, 1, 1)]
+        return (
+            min(b[0] for b in bboxes),
+            min(b[1] for b in bboxes),
+            max(b[2] for b in bboxes),
+            max(b[3] for b in bboxes),
+        )
+
+    @property
+    def extent(self):
+        """ the rectangle of the page, its frame if it has one, otherwise the bounds that enclose its placements """
+        return self.frame or self.bounds
+
+
+class Album:
+    """ The pages of an album. The editor shows all pages, below each other. """
+    __slots__ = ('pages',)
+
+    def __init__(self, pages=None):
+        self.pages = pages or [Page('page-1')]
+
+    def __iter__(self):
+        """ the placements of all pages, page by page from bottom to top """
+        return (p for page in self.pages for p in page)
+
+    def __len__(self):
+        return sum(len(page) for page in self.pages)
+
+    def add(self, placement):
+        """ add the placement on top of the others on its page, pages up to it are created as needed """
+        while len(self.pages) <= placement.page:
+            self.pages.append(Page(f'page-{len(self.pages) + 1}'))
+
+        return self.pages[placement.page].add(placement)
+
+    def remove(self, placement):
+        """ remove the placement from its page """
+        if placement.page < len(self.pages):
+            self.pages[placement.page].remove(placement)
+
+    @property
+    def bounds(self):
+        """ the bounds that enclose all pages that hold placements, including their frames """
+        bboxes = [page.extent for page in self.pages if len(page)] or [(0, 0, 1, 1)]
+        return (
+            min(b[0] for b in bboxes),
+            min(b[1] for b in bboxes),
+            max(b[2] for b in bboxes),
+            max(b[3] for b in bboxes),
+        )
+
+    @classmethod
+    def from_content(cls, content):
+        """ an album holding the placements as stored in an album file, on their pages """
+        album = cls()
+        [album.add(Placement.from_dict(c)) for c in identify(content)]
+        return album
+
+    def to_content(self):
+        """ the placements of all pages as stored in an album file """
+        return [p.to_dict() for p in self]
@@ -0,0 +1,109 @@
+"""
+Uniform grid spatial index of axis aligned bounding boxes
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from collections import defaultdict
+from math import floor
+
+
+class SpatialIndex:
+    """ Indexes bounding boxes (left, top, right, bottom) by key in a uniform grid of square cells. A box is stored in
+    every cell it overlaps, so queries only have to look at the boxes in the cells they overlap. """
+    _cell = 128
+
+    def __init__(self, cell=None):
+        self.cell = cell or self._cell
+        self._bounds = {}
+        self._cells = defaultdict(set)
+
+    def __contains__(self, key):
+        return key in self._bounds
+
+    def __len__(self):
+        return len(self._bounds)
+
+    def bounds(self, key):
+        """ the bounding box stored for key """
+        return self._bounds[key]
+
+    def insert(self, key, bbox):
+        """ add key with the given bounding box, replacing any box it had """
+        if key in self._bounds:
+            self.remove(key)
+
+        self._bounds[key] = tuple(bbox)
+        for cell in self._cells_of(bbox):
+            self._cells[cell].add(key)
+
+    def update(self, key, bbox):
+        """ set the bounding box of key, only the cells that it leaves or enters are touched """
+        if key not in self._bounds:
+            return self.insert(key, bbox)
+
+        old = set(self._cells_of(self._bounds[key]))
+        new = set(self._cells_of(bbox))
+        self._bounds[key] = tuple(bbox)
+
+        for cell in old - new:
+            self._discard(cell, key)
+        for cell in new - old:
+            self._cells[cell].add(key)
+
+    def move(self, key, dx, dy):
+        """ move the bounding box of key by dx, dy """
+        if key in self._bounds:
+            l, t, r, b = self._bounds[key]
+            self.update(key, (l + dx, t + dy, r + dx, b + dy))
+
+    def remove(self, key):
+        """ remove key from the index, if present """
+        if (bbox := self._bounds.pop(key, None)) is None:
+            return
+
+        for cell in self._cells_of(bbox):
+            self._discard(cell, key)
+
+    def clear(self):
+        """ remove all keys """
+        self._bounds.clear()
+        self._cells.clear()
+
+    def query_point(self, x, y):
+        """ the keys whose bounding box contains the point x, y """
+        candidates = self._cells.get((floor(x / self.cell), floor(y / self.cell)), ())
+        return {k for k in candidates if self._contains(self._bounds[k], x, y)}
+
+    def query_rect(self, left, top, right, bottom):
+        """ the keys whose bounding box overlaps the rectangle """
+        found = set()
+        for cell in self._cells_of((left, top, right, bottom)):
+            found.update(self._cells.get(cell, ()))
+
+        return {k for k in found if self._overlaps(self._bounds[k], (left, top, right, bottom))}
+
+    def _cells_of(self, bbox):
+        """ the cells that the bounding box overlaps """
+        l, t, r, b = bbox
+        for i in range(floor(l / self.cell), floor(r / self.cell) + 1):
+            for j in range(floor(t / self.cell), floor(b / self.cell) + 1):
+                yield i, j
+
+    def _discard(self, cell, key):
+        """ remove key from cell, dropping the cell once it is empty """
+        keys = self._cells[cell]
+        keys.discard(key)
+        if not keys:
+            del self._cells[cell]
+
+    @staticmethod
+    def _contains(bbox, x, y):
+        l, t, r, b = bbox
+        return l <= x <= r and t <= y <= b
+
+    @staticmethod
+    def _overlaps(bbox, other):
+        l, t, r, b = bbox
+        ol, ot, orr, ob = other
+        return l <= orr and ol <= r and t <= ob and ot <= b
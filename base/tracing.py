@@ -0,0 +1,154 @@
+"""
+Latency tracing of event handlers
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+import json
+import sys
+from functools import wraps
+from pathlib import Path
+from time import perf_counter, perf_counter_ns, strftime
+
+
+class Histogram:
+    """ Counts of latencies in buckets of powers of two microseconds. Bucket i holds the latencies below 2^i us and
+    from 2^(i-1) us, so recording a latency is a bit length and an increment. """
+    __slots__ = ('calls', 'total', 'longest', 'buckets')
+    _buckets = 32  # up to ~36 minutes
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """ forget all recorded latencies """
+        self.calls = 0
+        self.total = 0  # ns
+        self.longest = 0  # ns
+        self.buckets = [0] * self._buckets
+
+    def add(self, ns):
+        """ record a latency in ns """
+        self.calls += 1
+        self.total += ns
+        self.longest = max(self.longest, ns)
+        self.buckets[min((ns // 1000).bit_length(), self._buckets - 1)] += 1
+
+    def percentile(self, p):
+        """ the upper bound of the bucket that holds the p-th percentile, or the longest latency if lower, in ms """
+        rank = p / 100 * self.calls
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min(1 << i, self.longest / 1000) / 1000
+
+        return 0
+
+    def to_dict(self):
+        """ the summary statistics and the non-empty buckets, by their upper bound in us """
+        return dict(
+            calls=self.calls,
+            total_ms=self.total / 1e6,
+            mean_ms=self.total / self.calls / 1e6 if self.calls else 0,
+            max_ms=self.longest / 1e6,
+            p50_ms=self.percentile(50),
+            p90_ms=self.percentile(90),
+            p99_ms=self.percentile(99),
+            buckets={f'<{1 << i}us': n for i, n in enumerate(self.buckets) if n},
+        )
+
+
+class Tracer:
+    """ Records how often each traced handler is called and how long it takes. Handlers are traced by wrapping them
+    when they are bound, a disabled tracer returns them unwrapped, so tracing costs nothing unless it is enabled before
+    the bindings are made. """
+    _directory = Path.home() / '.cache' / 'photon' / 'traces'
+
+    def __init__(self, enabled=False, directory=None):
+        self.enabled = enabled
+        self.directory = Path(directory or self._directory)
+        self.histograms = {}
+
+    def wrap(self, name, handler):
+        """ the handler, timed under name if tracing is enabled """
+        if not self.enabled:
+            return handler
+
+        histogram = self.histograms.setdefault(name, Histogram())
+
+        @wraps(handler)
+        def traced(*args):
+            start = perf_counter_ns()
+            try:
+                return handler(*args)
+            finally:
+                histogram.add(perf_counter_ns() - start)
+
+        return traced
+
+    def call(self, name, handler, *args):
+        """ call the handler, timed under name if tracing is enabled. For handlers that are not bound once, but called
+        from a queue, such as the work of the frame scheduler """
+        if not self.enabled:
+            return handler(*args)
+
+        start = perf_counter_ns()
+        try:
+            return handler(*args)
+        finally:
+            self.histograms.setdefault(name, Histogram()).add(perf_counter_ns() - start)
+
+    @property
+    def stats(self):
+        """ the statistics of every traced handler that was called, by name """
+        return {name: h.to_dict() for name, h in sorted(self.histograms.items()) if h.calls}
+
+    def dump(self, path=None):
+        """ write the statistics to a json file that can be diffed against the dump of another build, by default to a
+        new file in the traces directory. Returns the path. """
+        if path is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f'trace-{strftime("%Y%m%d-%H%M%S")}.json'
+
+        with open(path, 'w') as f:
+            f.write(json.dumps(self.stats, indent=2, sort_keys=True))
+
+        return path
+
+    def clear(self):
+        """ forget all recorded latencies, the handlers stay traced """
+        [h.reset() for h in self.histograms.values()]
+
+
+class Timeline:
+    """ Marks the moments of the startup of the application, with the modules that were imported in between """
+    _notable = ('PIL', 'PIL.ImageTk', 'numpy', 'concurrent.futures.process')  # heavy modules that are reported
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.start = perf_counter()
+        self.marks = []  # label, time since start in s and the modules imported since the previous mark
+        self._modules = set(sys.modules)
+
+    def mark(self, label):
+        """ mark that the startup reached label """
+        modules = set(sys.modules)
+        self.marks.append((label, perf_counter() - self.start, modules - self._modules))
+        self._modules = modules
+
+    def report(self):
+        """ the marks as a table of the time since the start, the time since the previous mark and the imports """
+        lines = []
+        previous = 0
+        for label, t, imported in self.marks:
+            notable = ', '.join(m for m in self._notable if m in imported)
+            lines.append(f'{1000 * t:8.1f} ms {1000 * (t - previous):+8.1f} ms  {label:<24}{len(imported):4d} imports'
+                         f'{f" ({notable})" if notable else ""}')
+            previous = t
+
+        return '\n'.join(lines)
+
+
+tracer = Tracer()
+timeline = Timeline()
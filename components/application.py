@@ -4,31 +4,75 @@ main application class to run the program
 author: David den Uyl (djdenuyl@gmail.com)
 date: 2022-01-19
 """
-from tkinter import Tk
+from logging import info
+from tkinter import Tk, Scrollbar, HORIZONTAL, VERTICAL
 from typing import Callable
-from components.main_canvas import MainCanvas
-from components.sidebar import Sidebar
+from base.tracing import tracer, timeline
+from components.watchdog import Watchdog
 
 
 class Application(Tk):
     _name = 'Photon Editor - v0.0'
 
     """ The application """
-    def __init__(self, name=None):
+    def __init__(self, name=None, watchdog=None, proxy_cache_size=None, image_cache_size=None):
         super().__init__()
+        self.proxy_cache_size = proxy_cache_size
+        self.image_cache_size = image_cache_size
 
         self.name = name or self._name
         self.title(self.name)
 
+        # draw the empty window first, the components are built after it
+        self.update()
+        timeline.mark('window drawn')
+
+        self.build()
+        timeline.mark('components built')
+
+        # optionally, log the stalls of the main loop longer than the watchdog threshold in seconds
+        self.watchdog = Watchdog(self, watchdog).start() if watchdog else None
+
+        # the canvas places the initial album once idle, the timeline is reported after that
+        if timeline.enabled:
+            self.after_idle(self.report_startup)
+
+        self.mainloop()
+
+    def build(self):
+        """ build the components. They are imported here rather than at the top of the module, as they import PIL
+        and the image handling, which is only loaded once the window is drawn. """
+        from components.main_canvas import MainCanvas
+        from components.sidebar import Sidebar
+        from handlers.proxy_cache import proxy_cache
+        from handlers.image_cache import image_cache
+        timeline.mark('components imported')
+
+        # optionally, cap the on-disk proxy cache and the memory of decoded images at other sizes in bytes
+        if self.proxy_cache_size:
+            proxy_cache.max_bytes = self.proxy_cache_size
+        if self.image_cache_size:
+            image_cache.budget = self.image_cache_size
+
         # init components
         self.canvas = MainCanvas(master=self, bg='white')
         self.sidebar = Sidebar(master=self, container=self.canvas)
+        self.canvas.xscrollbar = Scrollbar(master=self, orient=HORIZONTAL, command=self.canvas.xview)
+        self.canvas.yscrollbar = Scrollbar(master=self, orient=VERTICAL, command=self.canvas.yview)
 
         # init bindings
         self.on_event_do('<<FileUpdated>>', self.update_title)
+        self.on_event_do('<<LoadProgress>>', self.sidebar.progress.on_progress)
+        self.on_event_do('<<ExportProgress>>', self.sidebar.export_progress.on_progress)
+
+        # journaled edits are saved to the album on a clean exit
+        self.protocol('WM_DELETE_WINDOW', self.on_close)
+
+        # the latencies of the traced handlers are dumped on ctrl+shift+t and on exit
+        if tracer.enabled:
+            self.bind('<Control-T>', lambda _: self.dump_trace())
 
         self.layout()
-        self.mainloop()
 
     def layout(self):
         """ create the app layout """
@@ -37,6 +81,30 @@ class Application(Tk):
 
         self.sidebar.grid(row=0, column=0, sticky="ns")
         self.canvas.grid(row=0, column=1, sticky="nsew")
+        self.canvas.yscrollbar.grid(row=0, column=2, sticky="ns")
+        self.canvas.xscrollbar.grid(row=1, column=1, sticky="ew")
+
+    def on_close(self):
+        """ end the session cleanly and close the application """
+        self.canvas.autosave.close()
+
+        if self.watchdog is not None:
+            self.watchdog.stop()
+
+        if tracer.enabled:
+            self.dump_trace()
+
+        self.destroy()
+
+    def report_startup(self):
+        """ print the startup timeline and close the application """
+        print(timeline.report())
+        self.on_close()
+
+    @staticmethod
+    def dump_trace():
+        """ write the latencies of the traced handlers to a file """
+        info(f'handler latencies written to {tracer.dump()}')
 
     def update_title(self, event_content):
         """ update the title when file updated events occur"""
@@ -44,7 +112,7 @@ class Application(Tk):
 
     def on_event_do(self, event: str, function: Callable):
         """ add event listener. trigger a function on event. similar to tk.bind but with the data param working """
-        cmd = self.register(function)
+        cmd = self.register(tracer.wrap(event, function))
         self.tk.call("bind", self, event, cmd + " %d")
 
 
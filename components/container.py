@@ -8,34 +8,69 @@ date: 2022-01-26
 """
 from PIL import Image
 from PIL.ImageTk import PhotoImage
-from tkinter import NW
+from tkinter import NW, CENTER
+from base.album import Placement
 from components.draggable import Draggable
 from components.rotatable import Rotatable
 from components.selectable import Selectable
 from components.scalable import Scalable
+from handlers.image_cache import image_cache, ImageCache
+from handlers.image_handling import rotate, level_index
+from handlers.layout import placed_size, PLACED_EDGE
+from handlers.proxy_cache import register
+
+# rotated previews, shared by all containers
+rotation_cache = ImageCache(budget=64 << 20)
 
 
 class Container:
     """ A Container for a widget that can be dragged and dropped. It is the liaison between the image and the canvas """
     _x = 10
     _y = 10
+    _size = PLACED_EDGE  # the long edge of a newly placed image on the canvas
+    _placeholder_fill = '#eeeeee'
+    _placeholder_outline = '#cccccc'
+    _error_fill = '#f4dada'
+    _error_outline = '#cc7777'
+    _rotation_step = 1  # degrees that rotation previews are snapped to
 
-    def __init__(self, canvas, image_path, x=None, y=None, anchor=None):
+    def __init__(self, canvas, image_path, x=None, y=None, anchor=None, size=None, angle=0, uid=None, page=0,
+                 frame=None):
         self.canvas = canvas
         self.image_path = image_path
-        self.image = Image.open(self.image_path)
-        self.image_tk = PhotoImage(self.image, Image.ANTIALIAS)
-        self.anchor = anchor or NW
+        self.level = None  # the decoded proxy level the image is rendered from
+        self.level_key = None
+        self.sizes = None  # the sizes of all proxy levels of the image
+        self.image_tk = None
+        self.placeholder_id = None
+        self.loading = False
+        self.stopped = False  # loading was cancelled or failed, it is retried once the container is back in view
+        self.hidden_since = None  # when the container left the visible region of the canvas
+        self.anchor = anchor or NW  # the anchor of the container, other anchors are only used while it is transformed
+
+        # only the header is read here, the image itself is decoded once the container becomes visible. The source is
+        # registered, so it shares its proxies with its exact duplicates when they are loaded.
+        register([image_path])
+        if size is None:
+            size = placed_size(self.image_path, self._size)
 
+        # the placement in the album is the model of the container, the canvas item only shows it. The placement is
+        # anchored at its top left, so the coords of the container are converted to that.
+        self.placement = Placement(image_path, 0, 0, *size, angle=angle, uid=uid, page=page, frame=frame)
+        self._anchor = self.anchor
         self.x = x or self._x
         self.y = y or self._y
+        self.placement.x, self.placement.y = self._anchored_bbox()[:2]
+        self.canvas.album.add(self.placement)
 
+        # the image item stays empty until the image is loaded, it only holds the geometry of the container
         self.id = self.canvas.create_image(
             self.x,
             self.y,
-            image=self.image_tk,
             anchor=self.anchor,
         )
+        self.canvas.index.insert(self.id, self.bbox)
+        self.canvas.container_by_id[self.id] = self
 
         # make container selectable
         self.selectable = Selectable(self)
@@ -48,3 +83,239 @@ class Container:
 
         # make container rotatable
         self.rotatable = Rotatable(self)
+
+        # let the canvas decide whether to load the image
+        self.canvas.request_viewport_update()
+
+    @property
+    def uid(self):
+        """ identifies the container across sessions, e.g. in the journal of its album """
+        return self.placement.uid
+
+    @property
+    def width(self):
+        """ the width of the container on the canvas, before rotation """
+        return self.placement.w
+
+    @property
+    def height(self):
+        """ the height of the container on the canvas, before rotation """
+        return self.placement.h
+
+    @property
+    def angle(self):
+        """ degrees, counter clockwise """
+        return self.placement.angle
+
+    @property
+    def size(self):
+        """ the size of the container on the canvas, before rotation """
+        return self.placement.size
+
+    @property
+    def display_size(self):
+        """ the size of the container on the canvas, after rotation """
+        return self.placement.display_size
+
+    @property
+    def bbox(self):
+        """ the bbox of the container on the canvas, also for containers whose image is not loaded """
+        return self.placement.bbox
+
+    @property
+    def current_anchor(self):
+        """ the anchor that the canvas item is currently positioned by """
+        return self._anchor
+
+    def anchor_point(self, anchor):
+        """ the point of the bbox of the container that corresponds to the anchor """
+        l, t, r, b = self.bbox
+        sides = '' if anchor == CENTER else anchor
+        x = l if 'w' in sides else r if 'e' in sides else (l + r) / 2
+        y = t if 'n' in sides else b if 's' in sides else (t + b) / 2
+        return x, y
+
+    def set_anchor(self, anchor):
+        """ position the canvas item by another anchor, without moving it. While the container is resized or rotated,
+        the anchor point stays in place. """
+        if anchor == self._anchor:
+            return
+
+        self.x, self.y = self.anchor_point(anchor)
+        self._anchor = anchor
+        self.canvas.coords(self.id, self.x, self.y)
+        self.canvas.itemconfig(self.id, anchor=anchor)
+
+    def move(self, dx, dy):
+        """ move the container by dx, dy """
+        self.placement.x += dx
+        self.placement.y += dy
+        self.x += dx
+        self.y += dy
+        self.canvas.move(self.id, dx, dy)
+
+        if self.placeholder_id is not None:
+            self.canvas.move(self.placeholder_id, dx, dy)
+
+    def load(self):
+        """ show a placeholder and decode the image in the background, unless it is already shown or loading, or its
+        loading was stopped """
+        if self.loading or self.stopped or self.image_tk is not None:
+            return
+
+        self.loading = True
+        if self.placeholder_id is None:
+            self.placeholder_id = self.canvas.create_rectangle(*self.bbox)
+        self.canvas.itemconfig(self.placeholder_id, fill=self._placeholder_fill, outline=self._placeholder_outline)
+        self.canvas.loader.submit(self)
+
+    def stop(self, failed=False):
+        """ stop loading, the container keeps its placeholder and its placement in the album. The placeholder of an
+        image that failed to load is shown as an error. """
+        self.loading = False
+        self.stopped = True
+
+        if failed and self.placeholder_id is not None:
+            self.canvas.itemconfig(self.placeholder_id, fill=self._error_fill, outline=self._error_outline)
+
+    def show(self, level_key, sizes, level):
+        """ replace the placeholder with the image, rendered from the decoded proxy level. Only that level is held in
+        the shared image cache, under level_key, until it is swapped for another level or the container is unloaded. """
+        self.loading = False
+        self.level_key = level_key
+        self.sizes = sizes
+        self.level = level
+        self._display(PhotoImage(self._render(self.angle)))
+        self.canvas.delete(self.placeholder_id)
+        self.placeholder_id = None
+
+    def unload(self):
+        """ release the image. The container stays on the canvas as an empty item that keeps its geometry """
+        if self.image_tk is None:
+            return
+
+        self.canvas.itemconfig(self.id, image='')
+        self.image_tk = None
+
+        image_cache.release(self.level_key)
+        self.level_key = None
+        self.sizes = None
+        self.level = None
+
+    def delete(self):
+        """ remove the container from the canvas and its placement from the album """
+        if self.loading:
+            self.canvas.loader.cancel(self)
+
+        if self in self.canvas.interaction.selection:
+            self.canvas.interaction.deselect(self)
+
+        self.unload()
+        self.canvas.delete(self.id)
+
+        if self.placeholder_id is not None:
+            self.canvas.delete(self.placeholder_id)
+            self.placeholder_id = None
+
+        self.canvas.album.remove(self.placement)
+        self.canvas.container_by_id.pop(self.id, None)
+        if self in self.canvas.containers:
+            self.canvas.containers.remove(self)
+
+    def resize(self, width, height, preview=False):
+        """ show the image at the given size, rendered from the proxy level that matches it. A preview is rendered
+        with a fast, low quality filter from the level that is already decoded, for use while the size is still
+        changing. """
+        self.placement.w, self.placement.h = width, height
+        self._update()
+
+        if not preview:
+            self._fit_level()
+        self._display(PhotoImage(self._render(self.angle, preview)))
+
+    def rotate(self, angle, preview=False):
+        """ show the image rotated by angle degrees counter clockwise. A preview is rendered with the angle snapped to
+        the rotation step and is cached, so going back and forth over the same angles does not rotate it again. """
+        self.placement.angle = angle % 360
+        self._update()
+
+        if not preview:
+            self._display(PhotoImage(self._render(self.angle)))
+            return
+
+        snapped = round(self.angle / self._rotation_step) * self._rotation_step % 360
+        self._display(rotation_cache.get(
+            (self.level_key, self.size, snapped),
+            lambda: PhotoImage(self._render(snapped, preview=True))
+        ))
+
+    def transform(self, x, y, size, angle):
+        """ place the top left of the container at x, y with the given size and angle, e.g. to undo an edit. A loaded
+        image is rendered again from its proxies. """
+        p = self.placement
+        p.x, p.y, (p.w, p.h), p.angle = x, y, size, angle % 360
+
+        # the canvas item is positioned by its own anchor again
+        self._anchor = self.anchor
+        self.x, self.y = self.anchor_point(self.anchor)
+        self.canvas.coords(self.id, self.x, self.y)
+        self.canvas.itemconfig(self.id, anchor=self.anchor)
+        self.canvas.index.update(self.id, self.bbox)
+
+        if self.image_tk is not None:
+            self._fit_level()
+            self._display(PhotoImage(self._render(self.angle)))
+
+        if self.placeholder_id is not None:
+            self.canvas.coords(self.placeholder_id, *self.bbox)
+
+        self.canvas.request_viewport_update()
+
+    def _update(self):
+        """ update the placement after its size or angle changed. The anchor point stays in place, so the top left of
+        the placement moves unless the container is anchored there. """
+        self.placement.x, self.placement.y = self._anchored_bbox()[:2]
+        self.canvas.index.update(self.id, self.bbox)
+
+    def _fit_level(self):
+        """ swap the decoded level for the smallest level that covers the size of the container, if that is another
+        level. A larger level is decoded when the container grows beyond its level, a smaller one frees memory when
+        it shrinks. """
+        if level_index(self.sizes, self.size) == self.level_key[1]:
+            return
+
+        level_key, self.sizes, level = self.canvas.loader.level(self.image_path, self.size)
+        image_cache.release(self.level_key)
+        self.level_key, self.level = level_key, level
+
+    def _render(self, angle, preview=False):
+        """ render the image at the size of the container, rotated by angle """
+        resample = Image.NEAREST if preview else Image.LANCZOS
+        image = self.level if self.level.size == tuple(self.size) else self.level.resize(self.size, resample)
+        return rotate(image, angle, Image.NEAREST if preview else Image.BICUBIC)
+
+    def _display(self, image_tk):
+        """ show image_tk in the canvas item of the container """
+        self.image_tk = image_tk
+        self.canvas.itemconfig(self.id, image=self.image_tk)
+
+    def _anchored_bbox(self):
+        """ the bbox of the container, calculated from its anchor point, size and the anchor it is positioned by """
+        width, height = self.display_size
+        sides = '' if self._anchor == CENTER else self._anchor
+
+        if 'w' in sides:
+            left = self.x
+        elif 'e' in sides:
+            left = self.x - width
+        else:
+            left = self.x - width / 2
+
+        if 'n' in sides:
+            top = self.y
+        elif 's' in sides:
+            top = self.y - height
+        else:
+            top = self.y - height / 2
+
+        return left, top, left + width, top + height
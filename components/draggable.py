@@ -13,21 +13,21 @@ class Draggable(Mutable):
         super().__init__(container)
         self._event_x = None
         self._event_y = None
-
-        self._add_binding('<ButtonPress-1>', self.on_press)
-        self._add_binding('<B1-Motion>', self.on_drag)
+        self._snap_x = 0  # the offset currently applied to snap to other containers
+        self._snap_y = 0
 
     def on_press(self, event):
         """ on click, set the original widget location """
         # collect the x,y event
         self._event_x = event.x
         self._event_y = event.y
+        self._snap_x = self._snap_y = 0
 
         # debug statement
         self._debug(event)
 
-    def on_drag(self, event):
-        """ on drag, move all canvas items with 'selected' tag """
+    def on_move(self, event):
+        """ on drag, post the movement to the frame scheduler, which moves all selected canvas items """
 
         # deltas to move
         dx = event.x - self._event_x
@@ -37,5 +37,23 @@ class Draggable(Mutable):
         self._event_x = event.x
         self._event_y = event.y
 
-        # move all selected
-        [self._move(i, dx, dy) for i in self._tagged('selected')]
+        self.canvas.scheduler.post(self, self._apply, dx, dy)
+
+    def on_release(self, _):
+        """ on release, apply any movement that is still pending """
+        self.canvas.scheduler.flush(self)
+
+    def _apply(self, dx, dy):
+        """ move all selected by the deltas collected since the last frame, snapping the container to the edges of
+        the containers near it """
+        interaction = self.canvas.interaction
+
+        # the position the container would have without snapping
+        l, t, r, b = self.container.bbox
+        dx, dy = dx - self._snap_x, dy - self._snap_y
+        sx, sy = self.canvas.snap((l + dx, t + dy, r + dx, b + dy), exclude=interaction.selected_ids)
+        self._snap_x, self._snap_y = sx, sy
+
+        # the selected containers move their placements, what is drawn around them only moves on the canvas
+        [c.move(dx + sx, dy + sy) for c in interaction.selection]
+        [self._move(i, dx + sx, dy + sy) for i in interaction.selection_decoration_ids]
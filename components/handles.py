@@ -0,0 +1,108 @@
+"""
+The selection handles, i.e. the scale and rotation arrows, are rendered once on first use and their canvas items are
+reused for every selection
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from dataclasses import dataclass, field
+from logging import debug
+from tkinter import S, SE, E, NE, N, NW, W, SW, HIDDEN, NORMAL
+from PIL import Image
+from PIL.ImageTk import PhotoImage
+
+# the direction of each handle, counter clockwise starting at the bottom centre of a container. Each next direction is
+# rotated by a further 45 degrees.
+DIRECTIONS = (S, SE, E, NE, N, NW, W, SW)
+ROTATIONS = tuple(45 * i for i in range(len(DIRECTIONS)))
+
+
+@dataclass(eq=False)
+class Handle:
+    """ The canvas item of a handle, which is placed around the selected container and hidden again. Kinds of handles
+    subclass it with the size of their sprite, the path of its asset and what dragging them does. """
+    canvas: None
+    anchor: str  # the anchorage of the handle relative to its container
+    rotation: int
+    image_tk: PhotoImage  # the rendered handle, shared through the handle atlas
+    container: None = field(init=False, default=None)
+    x: int = field(init=False, default=0)
+    y: int = field(init=False, default=0)
+    id: int = field(init=False)
+
+    def __post_init__(self):
+        # the handle is created hidden, it is shown around a container by placing it
+        self.id = self.canvas.create_image(self.x, self.y, image=self.image_tk, anchor=self.anchor, state=HIDDEN)
+
+    def place(self, container, x, y):
+        """ show the handle for container at x, y """
+        self.container = container
+        self.x, self.y = x, y
+
+        self.canvas.coords(self.id, x, y)
+        self.canvas.itemconfig(self.id, state=NORMAL)
+        self.canvas.tag_raise(self.id)
+        self.canvas.handle_index.insert(self.id, self.canvas.bbox(self.id))
+
+    def hide(self):
+        """ hide the handle, so it can be placed again for another container """
+        self.canvas.itemconfig(self.id, state=HIDDEN)
+        self.canvas.handle_index.remove(self.id)
+        self.container = None
+
+    @property
+    def container_anchor(self):
+        """ get the CURRENT anchor for the container. NB. self.container.anchor gets the INITIAL anchor """
+        return self.container.current_anchor
+
+    def _update_anchor(self, scale_anchor):
+        """ update the anchor of the container, without moving it """
+        debug('current anchor: %s at: %s target anchor: %s', self.container_anchor, self.container.bbox, scale_anchor)
+        self.container.set_anchor(scale_anchor)
+
+
+class HandleAtlas:
+    """ Holds the arrow sprites of each kind of handle in every rotation. The assets are decoded, rotated and
+    resized once, when a sprite is first needed, so showing handles afterwards does not touch the disk or PIL. """
+    def __init__(self):
+        self.sprites = {}
+
+    def get(self, kind, rotation):
+        """ the sprite of the given kind of handle in the given rotation """
+        key = kind, rotation % 360
+        if key not in self.sprites:
+            self.sprites[key] = self._render(*key)
+
+        return self.sprites[key]
+
+    @staticmethod
+    def _render(kind, rotation):
+        """ render the arrow asset of kind in the rotation and default size of that kind """
+        size = kind.__dataclass_fields__['size'].default
+
+        with Image.open(kind._arrow_asset_path) as image:
+            return PhotoImage(image.rotate(rotation).resize(size, Image.LANCZOS))
+
+
+class HandlePool:
+    """ A fixed set of hidden handle items, one per kind and direction, that are placed around the selected container
+    instead of creating and deleting canvas items on every selection change. The items of a kind are created when
+    its handles are first placed. """
+    def __init__(self, canvas, atlas=None):
+        self.canvas = canvas
+        self.atlas = atlas or HandleAtlas()
+        self.arrows = {}
+
+    def place(self, kind, container, xs, ys):
+        """ show the handles of kind for container at the given positions, in the order of DIRECTIONS """
+        if kind not in self.arrows:
+            sprites = [self.atlas.get(kind, r) for r in ROTATIONS]
+            self.arrows[kind] = [kind(self.canvas, d, r, s) for d, r, s in zip(DIRECTIONS, ROTATIONS, sprites)]
+
+        arrows = self.arrows[kind]
+        [a.place(container, x, y) for a, x, y in zip(arrows, xs, ys)]
+        return arrows
+
+    def hide(self):
+        """ hide all handles """
+        [a.hide() for arrows in self.arrows.values() for a in arrows if a.container is not None]
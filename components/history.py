@@ -0,0 +1,99 @@
+"""
+Undo and redo of the edits on the canvas
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from collections import deque
+from logging import debug
+
+from base.tracing import tracer
+from handlers.file_handling import place_album
+
+TRANSFORM = 'transform'
+PLACE = 'place'
+DELETE = 'delete'
+
+
+class History:
+    """ The undo and redo stacks of the edits on a canvas. An edit is an operation and the parameters of the containers
+    it changed: the geometry before and after a transform, or the placement of a container that was placed or deleted.
+    Images are never stored, undoing an edit renders the containers again from their cached proxies.
+
+    A gesture, such as dragging a selection of containers, is a single edit. """
+    _limit = 10_000  # edits that can be undone
+
+    def __init__(self, canvas, limit=None):
+        self.canvas = canvas
+        self.done = deque(maxlen=limit or self._limit)
+        self.undone = []
+
+        toplevel = self.canvas.winfo_toplevel()
+        toplevel.bind('<Control-z>', tracer.wrap('History.undo', lambda _: self.undo()))
+        toplevel.bind('<Control-y>', tracer.wrap('History.redo', lambda _: self.redo()))
+        toplevel.bind('<Control-Z>', tracer.wrap('History.redo', lambda _: self.redo()))
+
+    def transformed(self, changes):
+        """ record that containers were moved, scaled or rotated, changes are (container, before, after) geometries of
+        their placements """
+        self._push(TRANSFORM, tuple((c.uid, before, after) for c, before, after in changes))
+
+    def placed(self, placements):
+        """ record that containers were placed on the canvas """
+        self._push(PLACE, tuple(placements))
+
+    def deleted(self, placements):
+        """ record that containers were deleted from the canvas """
+        self._push(DELETE, tuple(placements))
+
+    def undo(self):
+        """ revert the last edit """
+        if not self.done:
+            return
+
+        edit = self.done.pop()
+        self._apply(*edit, reverse=True)
+        self.undone.append(edit)
+
+    def redo(self):
+        """ apply the last reverted edit again """
+        if not self.undone:
+            return
+
+        edit = self.undone.pop()
+        self._apply(*edit)
+        self.done.append(edit)
+
+    def clear(self):
+        """ forget all edits, e.g. when another album is opened """
+        self.done.clear()
+        self.undone.clear()
+
+    def _push(self, op, changes):
+        """ add an edit, which can no longer be followed by the edits that were undone """
+        if not changes:
+            return
+
+        self.done.append((op, changes))
+        self.undone.clear()
+
+    def _apply(self, op, changes, reverse=False):
+        """ apply the edit to the canvas, or revert it. The result is journaled as any other edit. """
+        debug('%s %s of %s containers', 'undo' if reverse else 'redo', op, len(changes))
+        self.canvas.interaction.deselect_all()
+        containers = {c.uid: c for c in self.canvas.containers}
+
+        if op == TRANSFORM:
+            for uid, before, after in changes:
+                x, y, w, h, angle = before if reverse else after
+                containers[uid].transform(x, y, (w, h), angle)
+                self.canvas.autosave.record(TRANSFORM, containers[uid].placement.to_dict())
+
+        # undoing a placement and redoing a deletion delete the containers, the other way around places them again
+        elif (op == PLACE) == reverse:
+            for placement in changes:
+                self.canvas.autosave.record(DELETE, dict(uid=placement['uid']))
+                containers[placement['uid']].delete()
+        else:
+            place_album(self.canvas, changes)
+            [self.canvas.autosave.record(PLACE, p) for p in changes]
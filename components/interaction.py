@@ -0,0 +1,200 @@
+"""
+Dispatching of the mouse events on the canvas to the containers and their handles
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from base.tracing import tracer
+
+SCALE = 'scale'
+ROTATE = 'rotate'
+
+
+class Interaction:
+    """ Dispatches the mouse events of a canvas. Each event is hit-tested once against the spatial indexes of the canvas
+    and routed to a single handler. Which containers are selected and which handles are shown is kept here as Python
+    state, canvas tags are only used for rendering.
+
+    A click on an unselected container selects it and shows its scale arrows, a click on a container that shows its
+    scale arrows switches them to rotation arrows and a click that neither changes the handles nor moves the container
+    deselects it. A click on the empty canvas deselects all and starts a rubber band selection. """
+    _band_dash = (4, 4)
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.selection = []
+        self.mode = None  # the handles shown around the primary selection: None, SCALE or ROTATE
+        self.handles = {}
+
+        # the state of the current click
+        self._gesture = None
+        self._pressed = None
+        self._selection_event = False
+        self._moved = False
+        self._band_id = None
+        self._before = {}  # the geometry of the selection at the start of the click
+
+        self.canvas.bind('<ButtonPress-1>', tracer.wrap('Interaction.on_press', self.on_press))
+        self.canvas.bind('<B1-Motion>', tracer.wrap('Interaction.on_move', self.on_move))
+        self.canvas.bind('<ButtonRelease-1>', tracer.wrap('Interaction.on_release', self.on_release))
+        self.canvas.winfo_toplevel().bind('<Delete>', tracer.wrap('Interaction.on_delete', self.on_delete))
+
+    @property
+    def primary(self):
+        """ the most recently selected container, which is the one that shows the handles """
+        return self.selection[-1] if self.selection else None
+
+    @property
+    def decoration_ids(self):
+        """ the ids of the bbox and handles drawn around the primary selection """
+        if self.primary is None:
+            return []
+
+        return [self.primary.selectable.bbox_id, *self.handles]
+
+    @property
+    def selection_decoration_ids(self):
+        """ the ids of the bboxes of all selected containers and of the handles """
+        return [c.selectable.bbox_id for c in self.selection] + list(self.handles)
+
+    @property
+    def selected_ids(self):
+        """ the ids of the selected containers and everything drawn around them """
+        return [i for c in self.selection for i in (c.id, c.selectable.bbox_id)] + list(self.handles)
+
+    def on_press(self, e):
+        """ on click, route the event to the handle or container that was hit, or start a rubber band """
+        x, y = self.canvas.canvasx(e.x), self.canvas.canvasy(e.y)
+        self._moved = False
+        self._selection_event = False
+
+        if (handle := self._hit_handle(x, y)) is not None:
+            self._before = {c: c.placement.geometry for c in self.selection}
+            self._gesture = handle
+            handle.on_click(e)
+            return
+
+        if (container := self._hit_container(x, y)) is None:
+            self.deselect_all()
+            self._band_id = self.canvas.create_rectangle(x, y, x, y, dash=self._band_dash)
+            return
+
+        if container not in self.selection:
+            self.select(container)
+            self._selection_event = True
+        elif container is self.primary and self.mode == SCALE:
+            self.show_handles(ROTATE)
+            self._selection_event = True
+
+        self._before = {c: c.placement.geometry for c in self.selection}
+        self._pressed = container
+        self._gesture = container.draggable
+        container.draggable.on_press(e)
+
+    def on_move(self, e):
+        """ on drag, stretch the rubber band or route the event to the handle or container that was pressed """
+        if self._band_id is not None:
+            x0, y0, _, _ = self.canvas.coords(self._band_id)
+            self.canvas.coords(self._band_id, x0, y0, self.canvas.canvasx(e.x), self.canvas.canvasy(e.y))
+        elif self._gesture is not None:
+            self._moved = True
+            self._gesture.on_move(e)
+
+    def on_release(self, e):
+        """ on release, end the gesture. A click on a selected container that did not change the handles and did
+        not move it, deselects it. """
+        if self._band_id is not None:
+            self._select_band()
+        elif self._gesture is not None:
+            self._gesture.on_release(e)
+
+            self._record_changes()
+
+            if self._pressed in self.selection and not self._selection_event and not self._moved:
+                self.deselect(self._pressed)
+
+        self._gesture = None
+        self._pressed = None
+        self._before = {}
+
+    def on_delete(self, _):
+        """ on the delete key, delete the selected containers """
+        deleted = [c.placement.to_dict() for c in self.selection]
+
+        for container in list(self.selection):
+            self.canvas.autosave.record('delete', dict(uid=container.uid))
+            container.delete()
+
+        self.canvas.history.deleted(deleted)
+
+    def select(self, container):
+        """ make container the only selected container and show its scale arrows """
+        self.deselect_all()
+        self.add_to_selection(container)
+        self.show_handles(SCALE)
+
+    def add_to_selection(self, container):
+        """ select the container without deselecting other containers """
+        # containers that are still loading can not be selected yet
+        if container in self.selection or container.image_tk is None:
+            return
+
+        container.selectable.draw_bbox()
+        self.selection.append(container)
+
+    def deselect(self, container):
+        """ deselect the container and remove everything drawn around it """
+        if container is self.primary:
+            self.hide_handles()
+
+        container.selectable.remove_bbox()
+        self.selection.remove(container)
+
+    def deselect_all(self):
+        """ deselect all containers """
+        [self.deselect(c) for c in list(self.selection)]
+
+    def show_handles(self, mode):
+        """ draw the handles of the given mode around the primary selection """
+        self.hide_handles()
+
+        behaviour = self.primary.scalable if mode == SCALE else self.primary.rotatable
+        self.handles = {a.id: a for a in behaviour.draw_arrows()}
+        self.mode = mode
+
+    def hide_handles(self):
+        """ hide the handles around the primary selection, their items are kept by the handle pool for reuse """
+        self.canvas.handle_pool.hide()
+        self.handles = {}
+        self.mode = None
+
+    def _hit_handle(self, x, y):
+        """ the topmost handle at x, y or None """
+        hits = [i for i in self.canvas.handle_index.query_point(x, y) if i in self.handles]
+        return self.handles[max(hits)] if hits else None
+
+    def _hit_container(self, x, y):
+        """ the topmost loaded container at x, y or None. Items created later are drawn on top. """
+        hits = [self.canvas.container_by_id[i] for i in self.canvas.index.query_point(x, y)]
+        containers = [c for c in hits if c.image_tk is not None]
+        return max(containers, key=lambda c: c.id) if containers else None
+
+    def _select_band(self):
+        """ select all containers that overlap the rubber band and remove it """
+        x0, y0, x1, y1 = self.canvas.coords(self._band_id)
+        self.canvas.delete(self._band_id)
+        self._band_id = None
+
+        hits = self.canvas.index.query_rect(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+        [self.add_to_selection(self.canvas.container_by_id[i]) for i in sorted(hits)]
+
+    def _record_changes(self):
+        """ journal the containers that were moved, scaled or rotated by the gesture that just ended and add them to
+        the history as a single edit """
+        changes = [
+            (c, before, after) for c, before in self._before.items()
+            if c in self.canvas.containers and (after := c.placement.geometry) != before
+        ]
+
+        [self.canvas.autosave.record('transform', c.placement.to_dict()) for c, _, _ in changes]
+        self.canvas.history.transformed(changes)
@@ -4,39 +4,231 @@ The main album canvas
 author: David den Uyl (ddenuyl@bebr.nl)
 date: 2022-01-25
 """
-from logging import debug
+from time import monotonic
 from tkinter import Canvas
 
+from base.album import Album
+from base.spatial_index import SpatialIndex
+from base.tracing import tracer, timeline
+from components.handles import HandlePool
+from components.history import History
+from components.interaction import Interaction
+from components.scheduler import FrameScheduler
 from handlers.file_handling import Reset
+from handlers.journal import Autosave
+from handlers.image_loader import ImageLoader
 
 
 class MainCanvas(Canvas):
-    """ Represents the main canvas in the application that holds the album """
+    """ Represents the main canvas in the application that shows the album. The album itself is a plain document
+    model, the canvas and its containers only show it and write the edits made on the canvas to it. The initial album is
+    placed once the event loop is idle, so the canvas is drawn before it. Only the containers in the visible region of
+    the canvas have their image loaded, containers that are off-screen for a while release theirs again.
+    The bounds of the containers and of the selection handles are kept in spatial indexes, which are used for hit
+    testing clicks, rubber band selection and snapping without querying the canvas item by item. Mouse events are
+    dispatched by the interaction of the canvas. The selection handles are a fixed pool of items that is shown and
+    hidden, rather than created and deleted. """
+    _prefetch_margin = 256  # px around the visible region in which containers are loaded ahead of time
+    _release_after = 5  # s that a container must be off-screen before its image is released
+    _sweep_interval = 1000  # ms
+    _scroll_increment = 40  # px
+    _snap_distance = 8  # px within which dragged containers snap to the edges of other containers
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.album = Album()  # the model of what is shown on the canvas
         self.containers = []
+        self.container_by_id = {}
+        self.loader = ImageLoader(self)
+        self.scheduler = FrameScheduler(self)
+        self.index = SpatialIndex()
+        self.handle_index = SpatialIndex()
+        self.handle_pool = HandlePool(self)
+        self.interaction = Interaction(self)
+        self.autosave = Autosave(self)
+        self.history = History(self)
+
+        # scrolling, the scrollbars are optional and set by the owner of the canvas
+        self.xscrollbar = None
+        self.yscrollbar = None
+        self._scrollregion = None
+        self._viewport_update_pending = False
+        self.configure(
+            xscrollcommand=self._on_xscroll,
+            yscrollcommand=self._on_yscroll,
+            xscrollincrement=self._scroll_increment,
+            yscrollincrement=self._scroll_increment,
+        )
 
         # bindings
-        self.bind('<Button-1>', self.deselect_all)
+        self.bind('<Configure>', tracer.wrap('MainCanvas.on_configure', lambda _: self.request_viewport_update()))
+        self.bind('<MouseWheel>', tracer.wrap('MainCanvas.on_wheel', self.on_wheel))
+        self.bind('<Button-4>', tracer.wrap('MainCanvas.on_wheel', self.on_wheel))
+        self.bind('<Button-5>', tracer.wrap('MainCanvas.on_wheel', self.on_wheel))
+        self.bind('<Destroy>', lambda _: self.loader.shutdown())
+
+        # periodically release the images of containers that have been off-screen for a while
+        self.after(self._sweep_interval, self._sweep)
+
+        # the initial album is placed after the canvas is drawn
+        self.after_idle(self.open_initial)
+
+    def open_initial(self):
+        """ recover the album of a session that crashed, or activate the reset button """
+        if not self.autosave.recover():
+            Reset(self).open()
+
+        timeline.mark('album placed')
+
+    @property
+    def visible_region(self):
+        """ the region of the canvas that is currently in view, in canvas coordinates """
+        return (
+            self.canvasx(0),
+            self.canvasy(0),
+            self.canvasx(self.winfo_width()),
+            self.canvasy(self.winfo_height()),
+        )
+
+    def snap(self, bbox, exclude=()):
+        """ the offset that aligns the edges of bbox with the nearest edges of the containers within the snap
+        distance, ignoring the ids in exclude """
+        d = self._snap_distance
+        left, top, right, bottom = bbox
+        offsets = {}
+
+        for k in self.index.query_rect(left - d, top - d, right + d, bottom + d) - set(exclude):
+            _l, _t, _r, _b = self.index.bounds(k)
+            for axis, edges, targets in (('x', (left, right), (_l, _r)), ('y', (top, bottom), (_t, _b))):
+                for edge in edges:
+                    for target in targets:
+                        offset = target - edge
+                        if abs(offset) <= d and abs(offset) < abs(offsets.get(axis, d + 1)):
+                            offsets[axis] = offset
+
+        return offsets.get('x', 0), offsets.get('y', 0)
+
+    def reindex(self, *ids):
+        """ update the bounds of the given items in the spatial index that holds them """
+        for i in ids:
+            if (bbox := self.bbox(i)) is None:
+                continue
+
+            if i in self.index:
+                self.index.update(i, bbox)
+            elif i in self.handle_index:
+                self.handle_index.update(i, bbox)
+
+    def delete(self, *args):
+        """ delete items from the canvas and the spatial indexes """
+        for tag in args:
+            for i in self._ids(tag):
+                self.index.remove(i)
+                self.handle_index.remove(i)
+
+        super().delete(*args)
+
+    def move(self, tag, dx, dy):
+        """ move items on the canvas and in the spatial indexes """
+        super().move(tag, dx, dy)
+
+        for i in self._ids(tag):
+            self.index.move(i, dx, dy)
+            self.handle_index.move(i, dx, dy)
+
+    def scale(self, tag, x, y, xs, ys):
+        """ scale items on the canvas and update their bounds in the spatial indexes """
+        super().scale(tag, x, y, xs, ys)
+        self.reindex(*self._ids(tag))
+
+    def _ids(self, tag):
+        """ the ids of the items matching tag, without a canvas round-trip if tag is already an id """
+        return (tag,) if isinstance(tag, int) else self.find_withtag(tag)
+
+    def clear(self):
+        """ remove all objects from the canvas and cancel any images that are still loading """
+        self.loader.cancel()
+        self.interaction.deselect_all()
+        [c.delete() for c in list(self.containers)]
+        self.delete('all')
+        self.album = Album()
+        self.containers = []
+        self.container_by_id = {}
+        self.history.clear()
+        self.index.clear()
+        self.handle_index.clear()
+
+        # the pooled handle items were deleted with everything else, recreate them from the already rendered atlas
+        self.handle_pool = HandlePool(self, self.handle_pool.atlas)
+
+    def on_wheel(self, e):
+        """ scroll vertically on the mouse wheel, or horizontally while shift is held """
+        units = -1 if e.num == 4 or e.delta > 0 else 1
+
+        if e.state & 0x1:
+            self.xview_scroll(units, 'units')
+        else:
+            self.yview_scroll(units, 'units')
+
+    def request_viewport_update(self):
+        """ update the viewport once the event loop is idle, multiple requests are handled by a single update """
+        if not self._viewport_update_pending:
+            self._viewport_update_pending = True
+            self.after_idle(self.update_viewport)
+
+    def update_viewport(self):
+        """ load the containers in or near the visible region, mark the others as hidden and fit the scrollregion
+        to the containers """
+        self._viewport_update_pending = False
+
+        left, top, right, bottom = self.visible_region
+        m = self._prefetch_margin
+        now = monotonic()
+
+        # the scrollregion always includes the origin and the current view
+        region = [min(0, left), min(0, top), right, bottom]
+
+        for c in self.containers:
+            _l, _t, _r, _b = c.bbox
+            region = [min(region[0], _l), min(region[1], _t), max(region[2], _r), max(region[3], _b)]
+
+            if _r >= left - m and _l <= right + m and _b >= top - m and _t <= bottom + m:
+                c.hidden_since = None
+                c.load()
+            else:
+                # images that stopped loading, because it was cancelled or failed, are loaded again once back in view
+                c.stopped = False
+                if c.hidden_since is None:
+                    c.hidden_since = now
+
+        # only reconfigure on changes, as it triggers the scroll commands, which request another update
+        if region != self._scrollregion:
+            self._scrollregion = region
+            self.configure(scrollregion=region)
+
+    def _sweep(self):
+        """ release the images of containers that have been hidden for longer than the release time. Selected containers
+        keep their images, as their handles may still be used to transform them. """
+        self.update_viewport()
+
+        now = monotonic()
+        selected = set(self.interaction.selection)
+        for c in self.containers:
+            if c.hidden_since is not None and now - c.hidden_since > self._release_after and c not in selected:
+                c.unload()
 
-        # activate the reset button
-        Reset(self).open()
+        self.after(self._sweep_interval, self._sweep)
 
-    def deselect_all(self, e):
-        """ remove selection from all objects on the canvas if none are clicked in the event. """
+    def _on_xscroll(self, first, last):
+        """ forward horizontal view changes to the scrollbar and update the viewport """
+        if self.xscrollbar is not None:
+            self.xscrollbar.set(first, last)
 
-        # go through all objects and check if the event happened within their bounding box, if so: return
-        for o in self.find_all():
-            _l, _t, _r, _b = self.bbox(o)
-            if _l <= e.x <= _r and _t <= e.y <= _b:
-                return
+        self.request_viewport_update()
 
-        # only deselect all if no objects were clicked (i.e. on empty canvas)
-        debug(f'event: {e}, '
-              f'func: deselect_all, '
-              f'deselecting ids: {self.find_withtag("selected")}')
-        # delete the bbox and corresponding arrows
-        [self.delete(c) for c in self.find_withtag('to_delete')]
+    def _on_yscroll(self, first, last):
+        """ forward vertical view changes to the scrollbar and update the viewport """
+        if self.yscrollbar is not None:
+            self.yscrollbar.set(first, last)
 
-        # remove selected tag from objects that have it
-        [self.dtag(c, 'selected') for c in self.find_withtag('selected')]
+        self.request_viewport_update()
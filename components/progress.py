@@ -0,0 +1,53 @@
+"""
+A component that displays the progress of background work on the canvas and allows cancelling it
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from tkinter import Frame, Button, Label, DISABLED, NORMAL
+from tkinter.ttk import Progressbar
+
+
+class Progress(Frame):
+    """ Represents a progress bar with a cancel button for the images being loaded onto the canvas, or for other
+    background work if a command to cancel it is given """
+    def __init__(self, canvas, *args, command=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.canvas = canvas
+        self.command = command or self.canvas.loader.cancel
+
+        self.bar = Progressbar(master=self, mode='determinate')
+        self.label = Label(master=self, text='')
+        self.canceller = Button(master=self, text='Cancel', command=self.cancel, state=DISABLED)
+
+        self.layout()
+
+    def layout(self):
+        self.columnconfigure(0, weight=1)
+
+        self.bar.grid(row=0, column=0, columnspan=2, sticky='ew')
+        self.label.grid(row=1, column=0, sticky='w')
+        self.canceller.grid(row=1, column=1, sticky='e')
+
+    def on_progress(self, event_content):
+        """ update the bar from the '<done> <total>' data of a progress event. Export progress events also carry the
+        throughput in pages/s and MB/s. """
+        done, total, *throughput = event_content.split()
+        done, total = int(done), int(total)
+
+        if done >= total:
+            self.bar['value'] = 0
+            self.label['text'] = ''
+            self.canceller['state'] = DISABLED
+            return
+
+        self.bar['maximum'] = total
+        self.bar['value'] = done
+        self.label['text'] = f'{done}/{total}'
+        if throughput:
+            self.label['text'] += ' ({} pages/s, {} MB/s)'.format(*throughput)
+        self.canceller['state'] = NORMAL
+
+    def cancel(self):
+        """ cancel the work in progress, by default the images that are still loading """
+        self.command()
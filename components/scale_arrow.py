@@ -10,79 +10,21 @@ from logging import debug
 from pathlib import Path
 from tkinter import S, W, N, E
 from typing import Tuple
-from PIL import Image
-from PIL.ImageTk import PhotoImage
-
-
-direction = {
-    'n': ('r', 't'),
-    'ne': ('r', 't'),
-    'e': ('r', 't'),
-    'se': ('r', 'b'),
-    's': ('l', 'b'),
-    'sw': ('l', 'b'),
-    'w': ('l', 'b'),
-    'nw': ('l', 't')
-}
-
-
-@dataclass
-class ScaleArrow:
-    container: None
-    x: int
-    y: int
-    anchor: str  # the anchorage of the arrow relative to its container
-    rotation: int
+from components.handles import Handle
+
+
+@dataclass(eq=False)
+class ScaleArrow(Handle):
     size: Tuple[int, int] = (25, 25)
-    id: int = field(init=False)
-    image: Image = field(init=False)
-    image_tk: PhotoImage = field(init=False)
     _arrow_asset_path = Path('assets', 'images', 'sizing_arrow.png')
     _event_x: int = field(init=False)
     _event_y: int = field(init=False)
-
-    def __post_init__(self):
-        # render the asset
-        self.image = Image.open(self._arrow_asset_path)
-        self.image_tk = PhotoImage(self.image.rotate(self.rotation).resize(self.size), Image.ANTIALIAS)
-        self.id = self.container.canvas.create_image(self.x, self.y, image=self.image_tk, anchor=self.anchor)
-
-        # add tags
-        self.container.canvas.addtag_withtag('scale_arrow', self.id)
-        self.container.canvas.addtag_withtag('selected', self.id)
-        self.container.canvas.addtag_withtag('to_delete', self.id)
-
-        # add bindings
-        self.container.canvas.tag_bind(self.id, '<ButtonPress-1>', self.on_click, add='+')
-        self.container.canvas.tag_bind(self.id, '<B1-Motion>', self.on_move, add='+')
-        self.container.canvas.tag_bind(self.id, '<ButtonRelease-1>', self.on_release, add='+')
-
-    @property
-    def tags(self):
-        """ get all tags for this object """
-        return self.container.canvas.gettags(self.id)
-
-    @property
-    def container_anchor(self):
-        """ get the CURRENT anchor for the container. NB. self.container.anchor gets the INITIAL anchor """
-        return self.container.canvas.itemcget(self.container.id, "anchor")
-
-    @property
-    def container_bbox(self):
-        """ get the CURRENT bbox of the container """
-        l, t, r, b = self.container.canvas.bbox(self.container.id)
-        return dict(l=l, t=t, r=r, b=b)
-
-    @property
-    def container_dimensions(self):
-        """ get the CURRENT dimensions of the container """
-        l, t, r, b = [v for _, v in self.container_bbox.items()]
-        # return the width, height
-        return r - l, b - t
+    _settle_id: str = field(init=False, default=None)
+    _settle_delay = 150  # ms without movement after which the preview is replaced by a high quality resample
 
     def on_click(self, event):
         """ on click, collect the events x,y coords and set the anchor to the scale anchor for this arrow """
-        debug(f'event: {event}, {self.__class__}')
+        debug('event: %s, %s', event, self.__class__)
 
         # collect the event x, y
         self._event_x = event.x
@@ -92,14 +34,24 @@ class ScaleArrow:
         self._update_anchor(self.anchor)
 
     def on_move(self, event):
-        """ on move, resize the image along the direction of the arrow. Also resize the bbox and arrow positions """
-        # calculate container dimensions
-        w0, h0 = self.container_dimensions
-
+        """ on move, post the movement to the frame scheduler, which merges motion events that arrive faster than the
+        container can be redrawn into a single redraw """
         # the amount of movement in x and y since last event
         dx = event.x - self._event_x
         dy = event.y - self._event_y
 
+        # update the event x, y
+        self._event_x = event.x
+        self._event_y = event.y
+
+        self.container.canvas.scheduler.post(self, self._redraw, dx, dy)
+
+    def _redraw(self, dx, dy):
+        """ resize the image along the direction of the arrow using a fast preview. Also resize the bbox and arrow
+        positions. The preview is resampled in high quality once the movement settles """
+        # calculate container dimensions
+        w0, h0 = self.container.size
+
         # determine how to calculate the new w/h of the container based on the anchorage
         if W in self.anchor:
             w = int(w0 + dx)
@@ -122,69 +74,39 @@ class ScaleArrow:
             w = 1
 
         # resize the image and update the canvas
-        self.container.image_tk = PhotoImage(self.container.image.resize((w, h)))
-        self.container.canvas.itemconfig(self.container.id, image=self.container.image_tk)
+        dw0, dh0 = self.container.display_size
+        self.container.resize(w, h, preview=True)
+        dw, dh = self.container.display_size
 
         # find the x, y anchorage
         x, y = self._get_coords_for_cardinal_direction(self.anchor)
 
-        # scale the arrows and bbox
-        for a in self.container.canvas.find_withtag('to_delete'):
-            self.container.canvas.scale(a, x, y, w / w0, h / h0)
+        # scale the arrows and bbox, by the change of the bounds of the (possibly rotated) container
+        for a in self.container.canvas.interaction.decoration_ids:
+            self.container.canvas.scale(a, x, y, dw / dw0, dh / dh0)
 
-        # update the event x, y
-        self._event_x = event.x
-        self._event_y = event.y
+        # resample in high quality if no movement follows
+        if self._settle_id is not None:
+            self.container.canvas.after_cancel(self._settle_id)
+        self._settle_id = self.container.canvas.after(self._settle_delay, self._settle)
+
+    def _settle(self):
+        """ replace the preview by a high quality resample of the image at its current size """
+        self._settle_id = None
+        self.container.resize(*self.container.size)
 
     def on_release(self, event):
-        """ set anchor back to original """
-        debug(f'event: {event}, {self.__class__}')
-        self._update_anchor(self.container.anchor)
+        """ apply any remaining movement, resample the image in high quality and set anchor back to original """
+        debug('event: %s, %s', event, self.__class__)
+        self.container.canvas.scheduler.flush(self)
 
-    def _update_anchor(self, scale_anchor):
-        """ update anchor
-        #   1. get coords of container bbox
-        #   2. lookup the coord values corresponding to the anchor
-        #   3. move the container to the new coords
-        #   4. update the anchor point (this will cause it to move back to the original bbox)
-        """
-        debug('updating anchor')
-        debug(f'current anchor: {self.container_anchor} '
-              f'at coords: {self.container.canvas.bbox(self.container.id)} '
-              f'target anchor: {scale_anchor}')
-
-        # if the target anchorage is already the current anchorage, skip updating
-        if scale_anchor != self.container_anchor:
-            # get the proper anchorage coords for the target anchor
-            coords = self._get_coords_for_cardinal_direction(scale_anchor)
-
-            # update the container to the new coords
-            self.container.canvas.coords(self.container.id, *coords)
-            # configure the container to the target anchor
-            self.container.canvas.itemconfig(self.container.id, anchor=scale_anchor)
-
-            debug(f'new anchor: {self.container.canvas.itemcget(self.container.id, "anchor")} '
-                  f'at coords: {self.container.canvas.bbox(self.container.id)}')
-
-        debug('container anchor is already scale anchor, skipping')
+        if self._settle_id is not None:
+            self.container.canvas.after_cancel(self._settle_id)
+            self._settle()
+
+        self._update_anchor(self.container.anchor)
 
     def _get_coords_for_cardinal_direction(self, anchor):
-        """ given the cardinal direction, return the coords of the current containers bbox
-        offset by half the width / length depending on the cardinal direction """
-        # get the coords for the anchor
-        x, y = [self.container_bbox.get(a) for a in direction.get(anchor)]
-
-        # determine the current width and height
-        w, h = self.container_dimensions
-
-        # offset if needed
-        if anchor == S:
-            x += w / 2
-        if anchor == W:
-            y -= h / 2
-        if anchor == N:
-            x -= w / 2
-        if anchor == E:
-            y += h / 2
-
-        return x, y
+        """ given the cardinal direction, return the coords of the point of the current containers bbox that
+        corresponds to it """
+        return self.container.anchor_point(anchor)
@@ -0,0 +1,76 @@
+"""
+Frame rate limited scheduling of the work done by motion event handlers
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from logging import debug
+from time import monotonic
+
+from base.tracing import tracer
+
+
+class FrameScheduler:
+    """ Collects the work posted by event handlers and applies it at most once per frame, driven by after().
+    Work is posted under a key, usually the handler itself. Work posted under a key that is already pending is merged
+    into it: its deltas are summed with the pending deltas and only the most recent callback runs. """
+    _rate = 60  # frames per second
+
+    def __init__(self, widget, rate=None):
+        self.widget = widget
+        self.rate = rate or self._rate
+        self.posted = 0
+        self.merged = 0
+        self.frames = 0
+        self._pending = {}
+        self._after_id = None
+        self._last_frame = 0
+
+    @property
+    def interval(self):
+        """ the minimum time between two frames, in seconds """
+        return 1 / self.rate
+
+    @property
+    def stats(self):
+        """ the number of posts, how many of them were merged into a pending post and the number of frames run """
+        return dict(
+            posted=self.posted,
+            merged=self.merged,
+            frames=self.frames,
+            merge_ratio=self.merged / self.posted if self.posted else 0,
+        )
+
+    def post(self, key, callback, *deltas):
+        """ call callback with deltas on the next frame, merged with any work that is pending under key """
+        self.posted += 1
+
+        if key in self._pending:
+            self.merged += 1
+            _, pending = self._pending[key]
+            deltas = tuple(a + b for a, b in zip(pending, deltas))
+
+        self._pending[key] = (callback, deltas)
+
+        if self._after_id is None:
+            delay = max(0, self.interval - (monotonic() - self._last_frame))
+            self._after_id = self.widget.after(int(delay * 1000), self._frame)
+
+    def flush(self, key):
+        """ apply the work pending under key right away, e.g. when the gesture that posted it ends """
+        if (work := self._pending.pop(key, None)) is not None:
+            callback, deltas = work
+            tracer.call(callback.__qualname__, callback, *deltas)
+
+        debug('frame scheduler: %s', self.stats)
+
+    def _frame(self):
+        """ apply all pending work """
+        self._after_id = None
+        self._last_frame = monotonic()
+        self.frames += 1
+
+        # work posted by the callbacks themselves is applied on the next frame
+        pending, self._pending = self._pending, {}
+        for callback, deltas in pending.values():
+            tracer.call(callback.__qualname__, callback, *deltas)
@@ -7,7 +7,9 @@ Created on 2022-01-19
 """
 from tkinter import Frame
 from components.counter import Counter
-from handlers.file_handling import FileOpener, FileSaver, ImageImporter, NewFileCreator, ImageExporter, Reset
+from components.progress import Progress
+from handlers.file_handling import FileOpener, FileSaver, ImageImporter, NewFileCreator, ImageExporter, Reset, \
+    CacheClearer, BatchImageExporter, FolderImporter
 
 
 class Sidebar(Frame):
@@ -18,9 +20,14 @@ class Sidebar(Frame):
         self.new = NewFileCreator(master=self, canvas=self.container, text='New File')
         self.open = FileOpener(master=self, canvas=self.container, text='Open File')
         self.save_as = FileSaver(master=self, canvas=self.container, text='Save File As')
-        self._import = ImageImporter(master=self, canvas=self.container, text='Import Image')
+        self._import = ImageImporter(master=self, canvas=self.container, text='Import Images')
+        self.import_folder = FolderImporter(master=self, canvas=self.container, text='Import Folder')
         self._export = ImageExporter(master=self, canvas=self.container, text='Export Image')
+        self.batch_export = BatchImageExporter(master=self, canvas=self.container, text='Export All Formats')
+        self.clear_cache = CacheClearer(master=self, text='Clear Cache')
         self.counter = Counter(master=self)
+        self.progress = Progress(master=self, canvas=self.container)
+        self.export_progress = Progress(master=self, canvas=self.container, command=self.batch_export.cancel)
 
         # TODO: deleteme
         self.reset = Reset(master=self, canvas=self.container, text='Reset Test')
@@ -32,6 +39,11 @@ class Sidebar(Frame):
         self.open.grid(row=1, column=0, sticky="ew", padx=5, pady=5)
         self.save_as.grid(row=2, column=0, sticky="ew", padx=5, pady=5)
         self._import.grid(row=3, column=0, sticky="ew", padx=5, pady=5)
-        self._export.grid(row=4, column=0, sticky="ew", padx=5, pady=5)
-        self.counter.grid(row=5, column=0, sticky="ew", padx=5, pady=5)
-        self.reset.grid(row=6, column=0, sticky="ew", padx=5, pady=5)
+        self.import_folder.grid(row=4, column=0, sticky="ew", padx=5, pady=5)
+        self._export.grid(row=5, column=0, sticky="ew", padx=5, pady=5)
+        self.batch_export.grid(row=6, column=0, sticky="ew", padx=5, pady=5)
+        self.clear_cache.grid(row=7, column=0, sticky="ew", padx=5, pady=5)
+        self.counter.grid(row=8, column=0, sticky="ew", padx=5, pady=5)
+        self.reset.grid(row=9, column=0, sticky="ew", padx=5, pady=5)
+        self.progress.grid(row=10, column=0, sticky="ew", padx=5, pady=5)
+        self.export_progress.grid(row=11, column=0, sticky="ew", padx=5, pady=5)
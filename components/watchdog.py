@@ -0,0 +1,95 @@
+"""
+Detection of stalls of the tk main loop
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+import sys
+from collections import Counter
+from logging import warning
+from pathlib import Path
+from threading import Thread, Event, main_thread
+from time import monotonic, strftime
+from traceback import format_stack
+
+
+class Watchdog:
+    """ Watches the tk main loop from a background thread. The main loop beats through after() and when a beat is
+    later than the threshold, the main loop is stalled. While it is, the stack of the main thread is sampled with
+    sys._current_frames, and once it beats again the duration of the stall and the stacks it spent its time in are
+    appended to the stall log. """
+    _threshold = 0.1  # s a beat may be late before the main loop is considered stalled
+    _interval = 0.05  # s between beats
+    _path = Path.home() / '.cache' / 'photon' / 'stalls.log'
+    _depth = 24  # innermost frames kept of a sampled stack
+
+    def __init__(self, widget, threshold=None, path=None):
+        self.widget = widget
+        self.threshold = threshold or self._threshold
+        self.path = Path(path or self._path)
+        self.stalls = 0
+        self.longest = 0.0
+        self._beat = monotonic()
+        self._samples = Counter()  # the sampled stacks of the current stall
+        self._stopped = Event()
+        self._thread = Thread(target=self._watch, name='photon-watchdog', daemon=True)
+
+    @property
+    def stats(self):
+        """ the number of stalls and the longest stall in ms """
+        return dict(stalls=self.stalls, longest_ms=1000 * self.longest)
+
+    def start(self):
+        """ start beating and watching """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._beat = monotonic()
+        self.widget.after(int(self._interval * 1000), self._ping)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """ stop watching, a stall that is in progress is not logged """
+        self._stopped.set()
+        self._thread.join()
+
+    def _ping(self):
+        """ beat, runs on the main loop """
+        self._beat = monotonic()
+
+        if not self._stopped.is_set():
+            self.widget.after(int(self._interval * 1000), self._ping)
+
+    def _watch(self):
+        """ sample the main thread while it is stalled and log the stall when it ends, runs on the background thread """
+        main = main_thread().ident
+        stalled_since = None
+
+        while not self._stopped.wait(self._interval / 2):
+            beat = self._beat
+            late = monotonic() - beat - self._interval
+
+            if late > self.threshold:
+                stalled_since = stalled_since or beat + self._interval
+                frame = sys._current_frames().get(main)
+                if frame is not None:
+                    self._samples[tuple(format_stack(frame)[-self._depth:])] += 1
+            elif stalled_since is not None:
+                # the stall lasted from when the beat was due until the late beat arrived
+                self._log(beat - stalled_since)
+                stalled_since = None
+
+    def _log(self, duration):
+        """ append a stall of duration seconds, with its sampled stacks from most to least frequent, to the log """
+        self.stalls += 1
+        self.longest = max(self.longest, duration)
+        samples, self._samples = self._samples, Counter()
+        total = sum(samples.values())
+
+        warning(f'the main loop stalled for {1000 * duration:.0f} ms, see {self.path}')
+
+        with open(self.path, 'a') as f:
+            f.write(f'{strftime("%Y-%m-%d %H:%M:%S")} stalled for {1000 * duration:.0f} ms\n')
+            for stack, n in samples.most_common():
+                f.write(f'  {n} of {total} samples in:\n')
+                f.write(''.join(f'    {line}' for line in ''.join(stack).splitlines(keepends=True)))
+            f.write('\n')
@@ -0,0 +1,190 @@
+"""
+Reading and writing of album files, and packed albums, a single file that holds the layout of an album, its source
+images and their display proxies
+
+An album is a json file of the placements of its images, or a packed album. A packed album is an uncompressed zip file.
+Because nothing is compressed, every member can be read straight from a memory map of the album at the offset given by
+the zip index. Images inside a packed album are referred to by the path of the album followed by the name of the
+member, e.g. 'holiday.hvz/sources/<hash>.jpg'.
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+import json
+from hashlib import sha1
+from io import BytesIO
+from mmap import mmap, ACCESS_READ
+from os import fdopen, replace
+from os.path import abspath, splitext, dirname
+from struct import Struct
+from tempfile import mkstemp
+from threading import Lock
+from zipfile import ZipFile, ZIP_STORED
+from PIL import Image
+
+from handlers.proxy_cache import pack_pyramid, unpack_pyramid, proxy_cache
+
+DEFAULT_PHOTON_EXTENSION = '.hv'
+PACKED_EXTENSION = '.hvz'
+LAYOUT = 'album.json'
+
+# the fixed part of a zip local file header, the lengths of the name and extra field are its last two fields
+LOCAL_HEADER = Struct('<4s5H3I2H')
+
+
+def split(path):
+    """ split the path of an image inside a packed album into the album path and the member name, or return None for
+    the path of a regular file """
+    head, sep, member = str(path).partition(f'{PACKED_EXTENSION}/')
+    return (f'{head}{PACKED_EXTENSION}', member) if sep else None
+
+
+def open_image(path):
+    """ open the image at path, which may be inside a packed album """
+    if (packed := split(path)) is None:
+        return Image.open(path)
+
+    album, member = packed
+    return Image.open(BytesIO(PackedAlbum.open(album).read(member)))
+
+
+def read_source(path):
+    """ the encoded bytes of the image at path, which may be inside a packed album """
+    if (packed := split(path)) is None:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    album, member = packed
+    return bytes(PackedAlbum.open(album).read(member))
+
+
+def read_album(filepath):
+    """ read the placements of the images in the album at filepath. The images of a packed album are referred to by
+    their path inside the album """
+    if filepath.endswith(PACKED_EXTENSION):
+        album = PackedAlbum.open(filepath)
+        return [{**c, 'image': f'{album.path}/{c["image"]}'} for c in album.layout]
+
+    with open(filepath, 'r') as f:
+        return json.loads(f.read())
+
+
+def write_album(filepath, content):
+    """ write the placements of the images to the album at filepath. A packed album also holds the images and their
+    proxies, so it does not depend on the original files """
+    if filepath.endswith(PACKED_EXTENSION):
+        PackedAlbum.write(filepath, content)
+        return
+
+    # write to a temporary file first, so a crash while saving does not leave a partially written album
+    fd, tmp = mkstemp(dir=dirname(abspath(filepath)), suffix=DEFAULT_PHOTON_EXTENSION)
+    with fdopen(fd, 'w') as f:
+        f.write(json.dumps(content))
+    replace(tmp, filepath)
+
+
+def proxy_member(member):
+    """ the name of the member that holds the proxies of the source member """
+    return f'proxies/{splitext(member)[0].rpartition("/")[2]}.pxy'
+
+
+class PackedAlbum:
+    """ A packed album, opened for random access. The members are located once, from the zip index, and are read as
+    slices of a memory map of the album. Open albums are shared, use PackedAlbum.open to get one. """
+    _albums = {}
+    _lock = Lock()
+
+    def __init__(self, path):
+        self.path = abspath(path)
+        self._file = open(self.path, 'rb')
+        self._map = mmap(self._file.fileno(), 0, access=ACCESS_READ)
+        self.index = self._index()
+        self.layout = json.loads(bytes(self.read(LAYOUT)))
+
+    @classmethod
+    def open(cls, path):
+        """ the open album at path, it is opened on first use """
+        path = abspath(path)
+        with cls._lock:
+            if path not in cls._albums:
+                cls._albums[path] = cls(path)
+
+            return cls._albums[path]
+
+    @classmethod
+    def forget(cls, path):
+        """ close the album at path if it is open, e.g. because the file was replaced """
+        with cls._lock:
+            album = cls._albums.pop(abspath(path), None)
+
+        if album is not None:
+            album.close()
+
+    def read(self, member):
+        """ a read only view of the bytes of member, without copying them """
+        offset, size = self.index[member]
+        return memoryview(self._map)[offset:offset + size]
+
+    def proxies(self, member):
+        """ the proxy pyramid of the source member """
+        return unpack_pyramid(self.read(proxy_member(member)))
+
+    def close(self):
+        """ release the memory map and the file. Views returned by read must be released first """
+        try:
+            self._map.close()
+        except BufferError:
+            # views are still held, the map is released once they are garbage collected
+            pass
+        self._file.close()
+
+    def _index(self):
+        """ the offset and size of the data of every member, computed from the zip index """
+        index = {}
+        with ZipFile(self._file) as z:
+            for info in z.infolist():
+                if info.compress_type != ZIP_STORED:
+                    raise ValueError(f'{info.filename} in {self.path} is compressed')
+
+                header = LOCAL_HEADER.unpack_from(self._map, info.header_offset)
+                name_length, extra_length = header[-2:]
+                offset = info.header_offset + LOCAL_HEADER.size + name_length + extra_length
+                index[info.filename] = (offset, info.file_size)
+
+        return index
+
+    @staticmethod
+    def write(path, placements):
+        """ write a packed album to path. Each placement is a dict with the path of its 'image', which may be inside a
+        packed album itself, and the 'location', 'size' and 'angle' of the image on the canvas. Identical images are
+        stored once, under the hash of their content. """
+        layout = []
+        members = {}
+
+        for p in placements:
+            data = read_source(p['image'])
+            name = f'sources/{sha1(data).hexdigest()}{splitext(p["image"])[1].lower()}'
+
+            if name not in members:
+                members[name] = data
+                members[proxy_member(name)] = PackedAlbum._packed_proxies(p['image'])
+
+            layout.append({**{k: v for k, v in p.items() if k != 'image'}, 'image': name})
+
+        # write to a temporary file first, the album at path may be open and in use
+        fd, tmp = mkstemp(dir=dirname(abspath(path)), suffix=PACKED_EXTENSION)
+        with fdopen(fd, 'wb') as f, ZipFile(f, 'w', ZIP_STORED) as z:
+            z.writestr(LAYOUT, json.dumps(layout))
+            [z.writestr(name, data) for name, data in members.items()]
+
+        PackedAlbum.forget(path)
+        replace(tmp, path)
+
+    @staticmethod
+    def _packed_proxies(image):
+        """ the serialized proxies of image, copied from the album the image is in, or from the proxy cache """
+        if (packed := split(image)) is not None:
+            album, member = packed
+            return bytes(PackedAlbum.open(album).read(proxy_member(member)))
+
+        return pack_pyramid(proxy_cache.load(image))
@@ -0,0 +1,176 @@
+"""
+Exporting of many pages to many output formats on a pool of worker processes
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from concurrent.futures import ProcessPoolExecutor, Future, wait
+from dataclasses import dataclass
+from logging import debug
+from multiprocessing import get_context
+from os import cpu_count
+from os.path import join, getsize
+from time import perf_counter
+from typing import Tuple, Optional
+
+from handlers.compositor import Compositor, Layer, scene
+
+SCREEN_DPI = 96
+SUFFIXES = {'PNG': '.png', 'JPEG': '.jpg', 'WEBP': '.webp', 'TIFF': '.tif'}
+
+
+@dataclass(frozen=True)
+class Target:
+    """ An output that is written for every page, either at a resolution in dpi or with its long edge fit to a number
+    of pixels. Params are passed to the encoder, as (name, value) pairs. """
+    name: str
+    format: str = 'PNG'
+    dpi: Optional[int] = None
+    edge: Optional[int] = None
+    params: Tuple[Tuple[str, object], ...] = ()
+
+    @property
+    def suffix(self):
+        """ the file extension of the format """
+        return SUFFIXES.get(self.format, f'.{self.format.lower()}')
+
+    def scale(self, page):
+        """ the scale from canvas pixels to output pixels of the page """
+        if self.edge is not None:
+            l, t, r, b = page.bounds
+            return self.edge / max(r - l, b - t)
+
+        return (self.dpi or SCREEN_DPI) / page.screen_dpi
+
+
+# a print resolution png and web sized jpegs
+TARGETS = (
+    Target('print', 'PNG', dpi=300),
+    Target('web', 'JPEG', edge=2048, params=(('quality', 85),)),
+    Target('thumbnail', 'JPEG', edge=512, params=(('quality', 85),)),
+)
+
+
+@dataclass(frozen=True)
+class Page:
+    """ The layers of a page and the bounds of the page in canvas pixels. Pages are sent to the worker processes, so
+    they only hold plain data. """
+    name: str
+    layers: Tuple[Layer, ...]
+    bounds: Tuple[float, float, float, float]
+    screen_dpi: float = SCREEN_DPI
+
+    @classmethod
+    def from_album(cls, album, name='page', screen_dpi=SCREEN_DPI):
+        """ the pages of the album that hold images. They are named after name, followed by their number if the album
+        has more than one page. """
+        numbered = len(album.pages) > 1
+        pages = []
+
+        for i, page in enumerate(album.pages):
+            if len(page):
+                layers, bounds = scene(page)
+                pages.append(cls(f'{name}-{i + 1}' if numbered else name, tuple(layers), bounds, screen_dpi))
+
+        return pages
+
+    @classmethod
+    def from_canvas(cls, canvas, name='page'):
+        """ the pages of the album shown on the canvas """
+        return cls.from_album(canvas.album, name, canvas.winfo_fpixels('1i'))
+
+
+def export_page(page, target, directory, budget=None):
+    """ render the page for target and write it to directory, returns the path and the size of the file. Runs in a
+    worker process, which decodes the sources of the page itself. The budget limits the memory the compositor holds
+    the page and its layers in, in bytes. """
+    path = join(directory, f'{page.name}-{target.name}{target.suffix}')
+    compositor = Compositor(page.layers, page.bounds, scale=target.scale(page), budget=budget)
+    compositor.save(path, dpi=target.dpi, format=target.format, **dict(target.params))
+    return path, getsize(path)
+
+
+class BatchExporter:
+    """ Exports every page to every target on a pool of worker processes. The workers are spawned rather than forked,
+    so they do not inherit the state of the tk main loop. Every output is rendered by a single worker from the same
+    inputs, so the files are identical to those of a serial export. """
+    _workers = cpu_count() or 1
+
+    def __init__(self, workers=None, budget=None):
+        self.workers = workers or self._workers
+        self.budget = budget  # bytes of memory per worker, see export_page
+        self.futures = []
+        self._executor = None
+        self._start = None
+
+    @property
+    def total(self):
+        """ the number of outputs of the current batch """
+        return len(self.futures)
+
+    @property
+    def done(self):
+        """ the number of outputs of the current batch that are finished, failed or cancelled """
+        return sum(f.done() for f in self.futures)
+
+    @property
+    def busy(self):
+        """ true while the current batch has outputs that are not finished """
+        return self.done < self.total
+
+    @property
+    def stats(self):
+        """ the progress and throughput of the current batch """
+        elapsed = perf_counter() - self._start if self._start is not None else 0
+        finished = [f for f in self.futures if f.done() and not f.cancelled() and f.exception() is None]
+        written = sum(f.result()[1] for f in finished)
+
+        return dict(
+            done=self.done,
+            total=self.total,
+            seconds=elapsed,
+            pages_per_s=len(finished) / elapsed if elapsed else 0,
+            mb_per_s=written / elapsed / (1 << 20) if elapsed else 0,
+        )
+
+    def submit(self, pages, targets, directory):
+        """ start exporting every page to every target in directory, returns a future per output """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context('spawn'))
+
+        self._start = perf_counter()
+        self.futures = [
+            self._executor.submit(export_page, p, t, directory, self.budget) for p in pages for t in targets
+        ]
+        return self.futures
+
+    def export(self, pages, targets, directory, serial=False):
+        """ export every page to every target in directory and wait for it. A serial export runs in this process. An
+        output that fails does not stop the others, the error of the first one that failed is raised once all are
+        done. """
+        if serial:
+            self._start = perf_counter()
+            self.futures = []
+            for page in pages:
+                for target in targets:
+                    future = Future()
+                    try:
+                        future.set_result(export_page(page, target, directory, self.budget))
+                    except Exception as e:
+                        future.set_exception(e)
+                    self.futures.append(future)
+        else:
+            wait(self.submit(pages, targets, directory))
+
+        debug(f'batch export: {self.stats}')
+        return [f.result()[0] for f in self.futures]
+
+    def cancel(self):
+        """ cancel the outputs that did not start yet """
+        [f.cancel() for f in self.futures]
+
+    def shutdown(self):
+        """ stop the worker processes, outputs that did not start yet are cancelled """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
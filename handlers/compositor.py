@@ -0,0 +1,167 @@
+"""
+Compositing of the album into a single image, rendered from the full resolution source images
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from dataclasses import dataclass
+from math import ceil
+from mmap import mmap
+from tempfile import TemporaryFile
+from typing import Tuple
+from PIL import Image
+
+from base.album import rotated_size
+from handlers.album_pack import open_image
+from handlers.image_cache import ImageCache
+from handlers.image_handling import has_alpha, rotate, decode
+
+DEFAULT_DPI = 300
+
+
+@dataclass(frozen=True)
+class Layer:
+    """ A source image placed in the scene. The centre and size are in canvas pixels, the size is before rotation and
+    the angle is in degrees counter clockwise. """
+    path: str
+    centre: Tuple[float, float]
+    size: Tuple[float, float]
+    angle: float = 0
+
+    @classmethod
+    def from_placement(cls, placement):
+        """ the layer of a placement in an album """
+        return cls(placement.source, placement.centre, placement.size, placement.angle)
+
+
+def scene(page):
+    """ the layers of all placements on a page of an album, bottom first, and the rectangle of the page. Pages that were
+    laid out are as large as their frame, other pages are cropped to the bounds of their placements. """
+    return [Layer.from_placement(p) for p in page], page.extent
+
+
+class Compositor:
+    """ Composites layers onto a white page from their source images, at any resolution. Layers are drawn in order,
+    so later layers are drawn on top.
+
+    The page is rendered tile by tile. Each tile only draws the layers that overlap it. Each layer is transformed to
+    the output resolution once, and is shared by all tiles it overlaps. If the page does not fit in the memory budget,
+    the tiles are written to a memory mapped file instead of a single image held in memory. """
+    _tile = 2048  # px, the edge of a tile
+    _budget = 256 << 20  # bytes, the largest page that is rendered in memory
+    _layer_budget = 256 << 20  # bytes, of transformed layers that are kept for the tiles that overlap them
+    _background = 'white'
+
+    def __init__(self, layers, bounds, scale=1, tile=None, budget=None):
+        self.layers = list(layers)
+        self.bounds = bounds
+        self.scale = scale
+        self.tile = tile or self._tile
+        self.budget = budget or self._budget
+
+        # the transformed layers, shared by the tiles they overlap. The least recently used are dropped over budget.
+        self._transformed = ImageCache(budget=min(self._layer_budget, self.budget))
+
+    @classmethod
+    def from_canvas(cls, canvas, dpi=DEFAULT_DPI, page=0, **kwargs):
+        """ a compositor of a page of the album shown on the canvas, at the given resolution """
+        layers, bounds = scene(canvas.album.pages[page])
+
+        # canvas pixels are screen pixels, so the scale is the ratio of the output resolution to that of the screen
+        return cls(layers, bounds, scale=dpi / canvas.winfo_fpixels('1i'), **kwargs)
+
+    @property
+    def size(self):
+        """ the size of the rendered page, in pixels """
+        l, t, r, b = self.bounds
+        return max(1, ceil((r - l) * self.scale)), max(1, ceil((b - t) * self.scale))
+
+    @property
+    def tiles(self):
+        """ the boxes of the tiles that cover the page, row by row """
+        w, h = self.size
+        return [
+            (x, y, min(x + self.tile, w), min(y + self.tile, h))
+            for y in range(0, h, self.tile)
+            for x in range(0, w, self.tile)
+        ]
+
+    def render(self):
+        """ render the page into an image in memory, regardless of the memory budget """
+        page = Image.new('RGB', self.size, self._background)
+        for box in self.tiles:
+            page.paste(self.render_tile(box), box[:2])
+
+        return page
+
+    def render_tile(self, box):
+        """ render the part of the page in box, a box in page pixels """
+        left, top, right, bottom = box
+        tile = Image.new('RGB', (right - left, bottom - top), self._background)
+
+        for i, layer in enumerate(self.layers):
+            if not self._overlaps(layer, box):
+                continue
+
+            image = self._transformed.get(i, lambda: self._transform(layer))
+            x, y = self._offset(layer, image.size)
+            tile.paste(image, (x - left, y - top), image if image.mode == 'RGBA' else None)
+
+        return tile
+
+    def save(self, path, dpi=None, **params):
+        """ render the page and write it to path. Pages that exceed the memory budget are rendered into a memory
+        mapped file, which is encoded from there. """
+        w, h = self.size
+        if dpi is not None:
+            params['dpi'] = (dpi, dpi)
+
+        if 3 * w * h <= self.budget:
+            self.render().save(path, **params)
+            return
+
+        stride = 3 * w
+        with TemporaryFile() as f:
+            f.truncate(stride * h)
+            with mmap(f.fileno(), stride * h) as buffer:
+                for box in self.tiles:
+                    left, top, right, _ = box
+                    data = self.render_tile(box).tobytes()
+                    row = 3 * (right - left)
+
+                    for r in range(len(data) // row):
+                        start = (top + r) * stride + 3 * left
+                        buffer[start:start + row] = data[r * row:(r + 1) * row]
+
+                Image.frombuffer('RGB', (w, h), buffer, 'raw', 'RGB', 0, 1).save(path, **params)
+
+    def _transform(self, layer):
+        """ decode the source of the layer, at a reduced scale if that covers the output, and scale and rotate it to the
+        output resolution """
+        size = self._scaled_size(layer)
+
+        with open_image(layer.path) as source:
+            image = decode(source, size).convert('RGBA' if has_alpha(source) else 'RGB')
+
+        image = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        return rotate(image, layer.angle)
+
+    def _scaled_size(self, layer):
+        """ the size of the layer at the output resolution, before rotation """
+        w, h = layer.size
+        return max(1, round(w * self.scale)), max(1, round(h * self.scale))
+
+    def _offset(self, layer, size):
+        """ the position on the page of the top left of the layer, transformed to the given size """
+        l, t, _, _ = self.bounds
+        cx, cy = layer.centre
+        w, h = size
+        return round((cx - l) * self.scale - w / 2), round((cy - t) * self.scale - h / 2)
+
+    def _overlaps(self, layer, box):
+        """ check whether the transformed layer overlaps the box, without transforming it. The bounds of the rotated
+        layer are widened by a pixel on each side, as PIL rounds the size of rotated images up. """
+        w, h = rotated_size(self._scaled_size(layer), layer.angle)
+        x, y = self._offset(layer, (w + 2, h + 2))
+        left, top, right, bottom = box
+        return x < right and y < bottom and x + w + 2 > left and y + h + 2 > top
@@ -0,0 +1,138 @@
+"""
+Detection of duplicate images. Exact duplicates are found by the hash of their content, near duplicates such as burst
+shots by a perceptual hash of a small thumbnail.
+
+The perceptual hashes are compared with numpy, which is optional. Without it, only exact duplicates are found. numpy
+is imported once near duplicates are searched for, so it does not slow down the startup of the editor.
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from concurrent.futures import ThreadPoolExecutor
+from logging import error, warning
+from os import cpu_count
+from os.path import basename, splitext
+from PIL import Image
+
+from handlers.album_pack import open_image, split
+from handlers.image_handling import decode
+from handlers.proxy_cache import content_digest
+
+HASH_SIZE = 8  # the perceptual hash compares rows of 8 neighbouring pixels in 8 rows, so it is 64 bits
+THRESHOLD = 6  # bits in which the hashes of near duplicates may differ
+
+# the perceptual hashes of images by the digest of their content
+_hashes = {}
+
+
+def digest(path):
+    """ the sha1 of the content of the image at path. Images inside a packed album are stored under it. """
+    if (packed := split(path)) is not None:
+        return splitext(basename(packed[1]))[0]
+
+    return content_digest(path)
+
+
+def thumbnail(path):
+    """ the image at path as a grayscale thumbnail of HASH_SIZE + 1 by HASH_SIZE pixels, decoded at the smallest scale
+    its decoder supports """
+    size = (HASH_SIZE + 1, HASH_SIZE)
+    with open_image(path) as image:
+        return decode(image, size).convert('L').resize(size, Image.BOX)
+
+
+def perceptual_hashes(thumbnails):
+    """ the difference hashes of the thumbnails, as an array of a row of HASH_SIZE bytes per thumbnail. Each bit tells
+    whether a pixel is brighter than its left neighbour, which is robust to changes in exposure and compression. """
+    import numpy as np
+
+    pixels = np.stack([np.asarray(t, dtype=np.int16) for t in thumbnails])
+    return np.packbits(pixels[:, :, 1:] > pixels[:, :, :-1], axis=-1).reshape(len(pixels), -1)
+
+
+def near_pairs(hashes, threshold=THRESHOLD, chunk=512):
+    """ the pairs of indices i < j of the hashes that differ in at most threshold bits. All pairs are compared, a chunk
+    of hashes against all hashes at a time, so the memory used stays bounded. With the bits as -1 and 1, the dot
+    product of two hashes is the number of bits minus twice the number of differing bits, so the distances of a chunk
+    are a single matrix product. """
+    import numpy as np
+
+    signs = np.unpackbits(hashes, axis=1).astype(np.float32) * 2 - 1
+    bits = signs.shape[1]
+    pairs = []
+
+    for start in range(0, len(signs), chunk):
+        distances = (bits - signs[start:start + chunk] @ signs.T) / 2
+        i, j = np.nonzero(distances <= threshold)
+        i += start
+        pairs.extend(zip(i[i < j].tolist(), j[i < j].tolist()))
+
+    return pairs
+
+
+def groups(pairs):
+    """ the groups of indices that are connected by the pairs """
+    parent = {}
+
+    def root(i):
+        while parent.setdefault(i, i) != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        parent[root(i)] = root(j)
+
+    members = {}
+    [members.setdefault(root(i), []).append(i) for i in list(parent)]
+    return [sorted(g) for g in members.values()]
+
+
+def find_duplicates(paths, threshold=THRESHOLD, workers=None):
+    """ the exact and the near duplicates among the images at paths, each as a list of groups of paths. Exact
+    duplicates are a single image to the near duplicate pass, which represents it by its first path. Images that cannot
+    be read are left out. """
+    with ThreadPoolExecutor(max_workers=workers or min(32, 4 * (cpu_count() or 1))) as executor:
+        digests = list(executor.map(_digest, paths))
+
+        by_digest = {}
+        [by_digest.setdefault(d, []).append(p) for p, d in zip(paths, digests) if d is not None]
+        exact = [g for g in by_digest.values() if len(g) > 1]
+
+        try:
+            import numpy as np
+        except ImportError:
+            warning('numpy is not installed, near duplicates are not detected')
+            return exact, []
+
+        # only images that were not hashed before are decoded
+        missing = [d for d in by_digest if d not in _hashes]
+        thumbnails = list(executor.map(lambda d: _thumbnail(by_digest[d][0]), missing))
+
+    read = [(d, t) for d, t in zip(missing, thumbnails) if t is not None]
+    if read:
+        _hashes.update(zip([d for d, _ in read], perceptual_hashes([t for _, t in read])))
+
+    keys = [d for d in by_digest if d in _hashes]
+    if not keys:
+        return exact, []
+
+    pairs = near_pairs(np.stack([_hashes[d] for d in keys]), threshold)
+    near = [[by_digest[keys[i]][0] for i in g] for g in groups(pairs)]
+    return exact, near
+
+
+def _digest(path):
+    """ the digest of the image at path, or None if it cannot be read """
+    try:
+        return digest(path)
+    except OSError as e:
+        error(f'could not read {path}: {e}')
+
+
+def _thumbnail(path):
+    """ the thumbnail of the image at path, or None if it cannot be decoded """
+    try:
+        return thumbnail(path)
+    except (OSError, ValueError) as e:
+        error(f'could not decode {path}: {e}')
@@ -5,31 +5,135 @@ Created on 2022-01-19
 
 @author: David den Uyl (ddenuyl@bebr.nl)
 """
-import json
+from concurrent.futures import ThreadPoolExecutor
+from logging import debug, error
 from enum import Enum
-from os import getcwd, remove
-from os.path import join
+from fnmatch import fnmatch
+from os import scandir
+from os.path import join, abspath, basename, splitext
 from tkinter import Button
-from tkinter.filedialog import askopenfilename, asksaveasfilename
-from PIL import Image
+from tkinter.filedialog import askopenfilename, askopenfilenames, asksaveasfilename, askdirectory
+from tkinter.messagebox import showinfo
+from tkinter.simpledialog import askinteger
+from base.album import identify
 from components.container import Container
+from handlers.album_pack import read_album, DEFAULT_PHOTON_EXTENSION
+from handlers.batch_export import BatchExporter, Page, TARGETS
+from handlers.compositor import Compositor, DEFAULT_DPI
+from handlers.duplicates import find_duplicates
+from handlers.layout import layout, read_sizes, JUSTIFIED, PAGE_GAP
+from handlers.proxy_cache import proxy_cache, register
 
-DEFAULT_PHOTON_EXTENSION = '.hv'
 DEFAULT_IMAGE_EXTENSION = '.png'
 
+# finds the duplicates of imported images in the background, one import at a time
+duplicate_finder = ThreadPoolExecutor(max_workers=1, thread_name_prefix='photon-duplicates')
+
 
 class ImageExtension(Enum):
-    """ enum of supported image extensions """
-    PNG = ('PNG Files', '*.png')
+    """ enum of supported image extensions. The file dialogs of tk on X11 match case sensitively, so the extensions are
+    also given in upper case, e.g. for the files of cameras """
+    IMAGES = ('Image Files', '*.png *.jpg *.jpeg *.webp *.tif *.tiff *.PNG *.JPG *.JPEG *.WEBP *.TIF *.TIFF')
+    PNG = ('PNG Files', '*.png *.PNG')
+    JPEG = ('JPEG Files', '*.jpg *.jpeg *.JPG *.JPEG')
+    WEBP = ('WebP Files', '*.webp *.WEBP')
+    TIFF = ('TIFF Files', '*.tif *.tiff *.TIF *.TIFF')
     ALL = ('All File', '*.*')
 
 
 class PhotonExtension(Enum):
     """ enum of supported Photon extensions """
     HV = ('Photon Files', '*.hv')
+    HVZ = ('Packed Photon Files', '*.hvz')
     ALL = ('All File', '*.*')
 
 
+def place_album(canvas, content):
+    """ create a container on the canvas for each placement, their images are decoded in the background """
+    [canvas.containers.append(Container(
+        canvas,
+        c['image'],
+        *c['location'],
+        size=c.get('size'),
+        angle=c.get('angle', 0),
+        uid=c['uid'],
+        page=c.get('page', 0),
+        frame=c.get('frame'),
+    )) for c in identify(content)]
+
+
+def import_images(canvas, paths, style=JUSTIFIED, batch=200):
+    """ lay the images out on new pages of the album, below its other pages, and place them on the canvas. Only their
+    headers are read to lay them out, the containers are created in batches from the event loop so the editor stays
+    responsive, and their images are decoded in the background once they become visible. The import is a single edit.
+    Duplicates of the imported images are reported once they are found. """
+    sizes = read_sizes(paths)
+    paths = [p for p in paths if p in sizes]
+
+    # all sources are registered before the first of them is loaded, so exact duplicates share their proxies
+    register(paths)
+
+    album = canvas.album
+    report_duplicates(canvas, [p.source for p in album] + [abspath(p) for p in paths], [abspath(p) for p in paths])
+
+    # the pages are added after the last page that holds images
+    origin = (Container._x, album.bounds[3] + PAGE_GAP if len(album) else Container._y)
+    first = 1 + max((p.page for p in album), default=-1)
+    bounds, pages, frames = layout([sizes[p] for p in paths], style, origin)
+    debug(f'laid out {len(paths)} images on {len(set(pages))} pages')
+
+    placed = []
+
+    def place(start):
+        # the rest of the import is dropped when another album is opened in the meantime
+        if canvas.album is not album:
+            return
+
+        for path, (x, y, w, h), page in zip(paths[start:start + batch], bounds[start:start + batch],
+                                            pages[start:start + batch]):
+            container = Container(canvas, abspath(path), x, y, size=(w, h), page=first + page, frame=frames[page])
+            canvas.containers.append(container)
+            canvas.autosave.record('place', container.placement.to_dict())
+            placed.append(container.placement.to_dict())
+
+        if start + batch < len(paths):
+            canvas.after(1, place, start + batch)
+        else:
+            canvas.history.placed(placed)
+
+    place(0)
+
+
+def report_duplicates(widget, paths, imported, poll_interval=100, listed=10):
+    """ find the exact and near duplicates among the images at paths in the background, and report those of the
+    imported images in a dialog. """
+    future = duplicate_finder.submit(find_duplicates, paths)
+    imported = set(imported)
+
+    def describe(title, found):
+        lines = [f'{title}:'] + [f'  {", ".join(basename(p) for p in g)}' for g in found[:listed]]
+        return '\n'.join(lines + ([f'  and {len(found) - listed} more'] if len(found) > listed else []))
+
+    def poll():
+        if not future.done():
+            widget.after(poll_interval, poll)
+            return
+
+        if future.exception() is not None:
+            error(f'could not find duplicates: {future.exception()}')
+            return
+
+        exact, near = [[g for g in found if imported.intersection(g)] for found in future.result()]
+        debug(f'{len(exact)} exact and {len(near)} near duplicates among {len(paths)} images')
+
+        if exact or near:
+            sections = [describe('Identical images', exact) if exact else '',
+                        describe('Similar images', near) if near else '']
+            showinfo('Import', '\n\n'.join(s for s in sections if s), parent=widget)
+
+    widget.after(poll_interval, poll)
+
+
 class NewFileCreator(Button):
     """ Represents a GUI component that handles creation of new files"""
     def __init__(self, canvas, *args, **kwargs):
@@ -38,8 +142,9 @@ class NewFileCreator(Button):
 
     def create_new_file(self):
         """Create a container in the canvas containing the image located at filepath """
-        [self.canvas.delete(c.id) for c in self.canvas.containers]
-        self.canvas.containers = []
+        self.canvas.autosave.attach()
+        self.canvas.clear()
+        self.canvas.autosave.compact()
 
 
 class ImageImporter(Button):
@@ -49,13 +154,44 @@ class ImageImporter(Button):
         self.canvas = canvas
 
     def open(self):
-        """Create a container in the canvas containing the image located at filepath """
-        filepath = askopenfilename(filetypes=[e.value for e in ImageExtension])
+        """Create a container in the canvas for each selected image, multiple images are laid out on pages """
+        filepaths = askopenfilenames(filetypes=[e.value for e in ImageExtension])
 
-        if not filepath:
+        if not filepaths:
+            return
+
+        if len(filepaths) > 1:
+            import_images(self.canvas, list(filepaths))
+            return
+
+        container = Container(self.canvas, image_path=filepaths[0])
+        self.canvas.containers.append(container)
+        self.canvas.autosave.record('place', container.placement.to_dict())
+        self.canvas.history.placed([container.placement.to_dict()])
+
+        report_duplicates(self, [p.source for p in self.canvas.album], [filepaths[0]])
+
+
+class FolderImporter(Button):
+    """ Represents a GUI component that imports all images in a folder, laid out on pages """
+    def __init__(self, canvas, *args, **kwargs):
+        super().__init__(*args, **kwargs, command=self.open)
+        self.canvas = canvas
+
+    def open(self):
+        """Import the images in a folder, in the order of their names """
+        directory = askdirectory(mustexist=True)
+
+        if not directory:
             return
 
-        self.canvas.containers.append(Container(self.canvas, image_path=filepath))
+        patterns = ImageExtension.IMAGES.value[1].split()
+        with scandir(directory) as entries:
+            filepaths = sorted(
+                e.path for e in entries if e.is_file() and any(fnmatch(e.name.lower(), p) for p in patterns)
+            )
+
+        import_images(self.canvas, filepaths)
 
 
 class ImageExporter(Button):
@@ -65,7 +201,8 @@ class ImageExporter(Button):
         self.canvas = canvas
 
     def save(self):
-        """Create a container in the canvas containing the image located at filepath """
+        """Export the album to an image per page, composited from the source images at the chosen resolution. The
+        images of an album of multiple pages are numbered. """
         filepath = asksaveasfilename(
             defaultextension=DEFAULT_IMAGE_EXTENSION,
             filetypes=[e.value for e in ImageExtension],
@@ -74,12 +211,67 @@ class ImageExporter(Button):
         if not filepath:
             return
 
-        # save the canvas
-        # TODO: this feels hacky, investigate if I can directly export to PNG
-        self.canvas.postscript(file=f'{filepath}.ps')
-        img = Image.open(f'{filepath}.ps')
-        img.save(filepath)
-        remove(f'{filepath}.ps')
+        dpi = askinteger('Export', 'Resolution (dpi)', initialvalue=DEFAULT_DPI, minvalue=1, parent=self)
+
+        if not dpi:
+            return
+
+        pages = self.canvas.album.pages
+        stem, suffix = splitext(filepath)
+        for i, page in enumerate(pages):
+            if len(page):
+                path = f'{stem}-{i + 1}{suffix}' if len(pages) > 1 else filepath
+                Compositor.from_canvas(self.canvas, dpi, page=i).save(path, dpi=dpi)
+
+
+class BatchImageExporter(Button):
+    """ Represents a GUI component that exports the album to all export targets at once, on worker processes.
+    Progress is reported through <<ExportProgress>> events with data '<done> <total> <pages/s> <MB/s>'. """
+    _poll_interval = 100  # ms
+
+    def __init__(self, canvas, *args, targets=TARGETS, **kwargs):
+        super().__init__(*args, **kwargs, command=self.save)
+        self.canvas = canvas
+        self.targets = targets
+        self.exporter = BatchExporter()
+
+        self.bind('<Destroy>', lambda _: self.exporter.shutdown())
+
+    def save(self):
+        """Export the album to every target in a directory, without blocking the editor """
+        if self.exporter.busy:
+            return
+
+        directory = askdirectory(mustexist=True)
+
+        if not directory:
+            return
+
+        self.exporter.submit(Page.from_canvas(self.canvas), self.targets, directory)
+        self.after(self._poll_interval, self._poll)
+
+    def cancel(self):
+        """Cancel the outputs that are not being exported yet """
+        self.exporter.cancel()
+
+    def _poll(self):
+        """ report the progress of the export until it is done """
+        stats = self.exporter.stats
+        self.event_generate(
+            '<<ExportProgress>>',
+            data=f'{stats["done"]} {stats["total"]} {stats["pages_per_s"]:.1f} {stats["mb_per_s"]:.1f}',
+            when='tail'
+        )
+
+        if self.exporter.busy:
+            self.after(self._poll_interval, self._poll)
+            return
+
+        for future in self.exporter.futures:
+            if not future.cancelled() and future.exception() is not None:
+                error(f'could not export: {future.exception()}')
+
+        debug(f'batch export: {stats}')
 
 
 class FileOpener(Button):
@@ -95,16 +287,14 @@ class FileOpener(Button):
         if not filepath:
             return
 
-        # remove old objects
-        self.canvas.delete('all')
-        self.canvas.containers = []
+        # edits of the current album are saved to it, edits from here on are journaled next to the opened album
+        self.canvas.autosave.attach(filepath)
 
-        # create new objects
-        with open(filepath, 'r') as f:
-            content = json.loads(f.read())
+        # remove old objects, including any that are still loading
+        self.canvas.clear()
 
-        # append all images to the list containers
-        [self.canvas.containers.append(Container(self.canvas, c['image'], *c['location'])) for c in content]
+        # create new objects, including the edits of a session on this album that did not end cleanly
+        place_album(self.canvas, self.canvas.autosave.load(filepath))
 
         # fire an file updated event
         self.event_generate('<<FileUpdated>>', data=filepath, when='tail')
@@ -126,21 +316,25 @@ class FileSaver(Button):
         if not filepath:
             return
 
-        # save photon file
-        content = [
-            {
-                'image': join(getcwd(), c.image_path),
-                'location': self.canvas.coords(c.id)
-            } for c in self.canvas.containers
-        ]
-
-        with open(filepath, 'w') as f:
-            f.write(json.dumps(content))
+        # save photon file, a packed album is only written in full here, edits from here on are journaled next to it
+        self.canvas.autosave.attach(filepath)
+        self.canvas.autosave.compact(pack=True)
 
         # fire an file updated event
         self.event_generate('<<FileUpdated>>', data=filepath, when='tail')
 
 
+class CacheClearer(Button):
+    """ Represents a GUI component that clears the on-disk cache of image proxies """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs, command=self.clear)
+
+    @staticmethod
+    def clear():
+        """Remove all cached proxies, they are rebuilt from the source images when next needed."""
+        proxy_cache.clear()
+
+
 # TODO: deleteme
 class Reset(Button):
     """ Represents a GUI component that resets to test"""
@@ -150,13 +344,10 @@ class Reset(Button):
 
     def open(self):
         """Open a file for editing."""
-        # remove old objects
-        self.canvas.delete('all')
-        self.canvas.containers = []
+        # remove old objects, including any that are still loading
+        self.canvas.autosave.attach()
+        self.canvas.clear()
 
         # create new objects
-        with open(join('data', 'test.hv'), 'r') as f:
-            content = json.loads(f.read())
-
-        # append all images to the list containers
-        [self.canvas.containers.append(Container(self.canvas, c['image'], *c['location'])) for c in content]
+        place_album(self.canvas, read_album(join('data', 'test.hv')))
+        self.canvas.autosave.compact()
@@ -0,0 +1,130 @@
+"""
+Process wide, memory budgeted cache of decoded images
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from logging import debug
+from threading import Lock
+from typing import Any
+
+
+def sizeof(value):
+    """ the approximate number of bytes held by the pixel data of a cached value """
+    if hasattr(value, 'nbytes'):
+        return value.nbytes
+    if hasattr(value, 'getbands'):
+        return len(value.getbands()) * value.width * value.height
+
+    # tk photo images are stored as 32 bits per pixel
+    return 4 * value.width() * value.height()
+
+
+@dataclass
+class Entry:
+    value: Any
+    nbytes: int
+    refs: int = 0
+
+
+class ImageCache:
+    """ A cache of decoded images, shared by all users in the process. Users acquire an entry by key, which decodes
+    it on a miss, and release it once they no longer display it. When the cache grows beyond its memory budget, the
+    least recently used entries that are not held by anyone are evicted. """
+    _budget = 512 << 20
+
+    def __init__(self, budget=None):
+        self.budget = budget or self._budget
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._key_locks = {}
+
+    @property
+    def stats(self):
+        """ the hit and miss counts and the memory use of the cache """
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            entries=len(self._entries),
+            nbytes=self.nbytes,
+            budget=self.budget,
+        )
+
+    def acquire(self, key, factory):
+        """ return the value for key and hold a reference to it. On a miss, the value is created by calling factory.
+        Concurrent misses on the same key call the factory only once. """
+        if (value := self._hit(key)) is not None:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, Lock())
+
+        with key_lock:
+            # another thread may have created the value while we were waiting
+            if (value := self._hit(key)) is not None:
+                return value
+
+            value = factory()
+
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = Entry(value, sizeof(value), refs=1)
+                self.nbytes += self._entries[key].nbytes
+                self._key_locks.pop(key, None)
+                self._evict()
+
+        return value
+
+    def release(self, key):
+        """ drop a reference to key, the entry stays cached until it is evicted """
+        with self._lock:
+            if (entry := self._entries.get(key)) is not None:
+                entry.refs = max(0, entry.refs - 1)
+            self._evict()
+
+    def get(self, key, factory):
+        """ return the value for key without holding a reference to it. Use for values the caller keeps alive itself """
+        value = self.acquire(key, factory)
+        self.release(key)
+        return value
+
+    def clear(self):
+        """ drop all entries that are not held by anyone """
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.refs == 0]:
+                self._remove(key)
+
+    def _hit(self, key):
+        """ return the value for key and hold a reference to it, or None if it is not cached """
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                return None
+
+            self._entries.move_to_end(key)
+            entry.refs += 1
+            self.hits += 1
+            return entry.value
+
+    def _evict(self):
+        """ evict unreferenced entries in least recently used order until the cache is within budget """
+        if self.nbytes <= self.budget:
+            return
+
+        for key in [k for k, e in self._entries.items() if e.refs == 0]:
+            if self.nbytes <= self.budget:
+                break
+
+            self._remove(key)
+            debug(f'evicted {key} from the image cache')
+
+    def _remove(self, key):
+        """ remove the entry for key """
+        self.nbytes -= self._entries.pop(key).nbytes
+
+
+image_cache = ImageCache()
@@ -0,0 +1,134 @@
+"""
+Decoding of source images into multi-resolution display proxies
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from io import BytesIO
+from PIL import Image, ImageOps
+
+# long edge, in pixels, of each proxy level
+PROXY_LEVELS = (256, 1024, 2048)
+
+# the exif tag of the orientation of an image, and the orientations in which the image is turned by 90 degrees
+ORIENTATION = 0x0112
+TRANSPOSED = (5, 6, 7, 8)
+
+
+def has_alpha(image):
+    """ check whether the image carries transparency """
+    return image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+
+
+def orientation(image):
+    """ the exif orientation of an opened image, 1 if it has none. The image is not decoded. """
+    # the exif of some formats, e.g. png, may follow the pixel data, it is only looked up where it is in the header
+    if 'exif' not in image.info and not hasattr(image, 'tag_v2'):
+        return 1
+
+    return image.getexif().get(ORIENTATION, 1)
+
+
+def oriented_size(image):
+    """ the size of an opened image as it is displayed, i.e. after its exif orientation is applied """
+    w, h = image.size
+    return (h, w) if orientation(image) in TRANSPOSED else (w, h)
+
+
+def decode(image, size=None):
+    """ decode an opened image with its exif orientation applied. If the size it is needed at is given, a jpeg is
+    decoded at the smallest scale of 1/1, 1/2, 1/4 or 1/8 that still covers that size, straight from its dct data.
+    Formats without reduced scale decoding are decoded at full size. """
+    transposed = orientation(image) in TRANSPOSED
+
+    if size is not None:
+        w, h = size
+        image.draft(None, (h, w) if transposed else (w, h))
+
+    # the image is oriented after it is decoded at the reduced scale, so the transpose is cheap
+    return ImageOps.exif_transpose(image) if orientation(image) != 1 else image
+
+
+def fit(size, edge):
+    """ scale size down, keeping the aspect ratio, so that its long edge is at most edge. Never scales up. """
+    w, h = size
+    factor = min(1, edge / max(w, h))
+    return max(1, round(w * factor)), max(1, round(h * factor))
+
+
+def rotate(image, angle, resample=Image.BICUBIC):
+    """ rotate the image by angle degrees counter clockwise, expanding it to fit. The corners are transparent. """
+    if not angle % 360:
+        return image
+
+    return image.convert('RGBA').rotate(angle, resample, expand=True)
+
+
+def level_index(sizes, size):
+    """ the index of the smallest of sizes that covers size, or of the largest if none does. The sizes are smallest
+    first. """
+    edge = max(size)
+    for i, level in enumerate(sizes):
+        if max(level) >= edge:
+            return i
+
+    return len(sizes) - 1
+
+
+class ProxyPyramid:
+    """ A set of downsampled copies (levels) of a source image, smallest first. The source is decoded once, when the
+    pyramid is built. Afterwards only the levels are used for display. A level is either a decoded image, or the
+    encoded bytes of one as it is read from the proxy cache, which are only decoded when the level is needed. """
+    def __init__(self, source_size, levels, sizes=None):
+        self.source_size = source_size
+        self.levels = levels
+        self.sizes = sizes or [level.size for level in levels]
+
+    @classmethod
+    def from_path(cls, path, levels=PROXY_LEVELS):
+        """ decode the image at path and build the proxy levels, each level is downsampled from the one above it. The
+        source is decoded at the smallest scale that covers the largest level. """
+        with Image.open(path) as source:
+            source_size = oriented_size(source)
+            image = decode(source, fit(source_size, max(levels)))
+            image = image.convert('RGBA' if has_alpha(source) else 'RGB')
+
+        proxies = []
+        for edge in sorted(levels, reverse=True):
+            # sources that cannot be decoded at a reduced scale are first reduced by an integer factor, which is cheap
+            if max(image.size) > edge:
+                image = image.resize(fit(image.size, edge), Image.LANCZOS, reducing_gap=3.0)
+
+            # a source smaller than a level yields the same image for multiple levels, only keep it once
+            if not proxies or proxies[0].size != image.size:
+                proxies.insert(0, image)
+
+        return cls(source_size, proxies)
+
+    @property
+    def nbytes(self):
+        """ the approximate memory held by the levels, encoded levels count by their encoded size """
+        return sum(len(p) if isinstance(p, bytes) else len(p.getbands()) * p.width * p.height for p in self.levels)
+
+    def level(self, index):
+        """ the level at index as an image, an encoded level is decoded on every call """
+        level = self.levels[index]
+        if not isinstance(level, bytes):
+            return level
+
+        image = Image.open(BytesIO(level))
+        image.load()
+        return image
+
+    def level_index(self, size):
+        """ the index of the smallest level that covers size, or of the largest level if none does """
+        return level_index(self.sizes, size)
+
+    def level_for(self, size):
+        """ return the smallest level that covers size, or the largest level if none does """
+        return self.level(self.level_index(size))
+
+    def render(self, size, resample=Image.LANCZOS):
+        """ return an image of the given size, resampled from the level that best matches it """
+        level = self.level_for(size)
+        return level if level.size == tuple(size) else level.resize(size, resample)
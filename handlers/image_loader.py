@@ -0,0 +1,124 @@
+"""
+Background decoding of images on a pool of worker threads
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from concurrent.futures import ThreadPoolExecutor
+from logging import error, debug
+from os import cpu_count
+from queue import Queue, Empty
+
+from handlers.album_pack import PackedAlbum, split
+from handlers.image_cache import image_cache
+from handlers.proxy_cache import proxy_cache, file_identity, source_key
+
+
+class ImageLoader:
+    """ Decodes the images of containers on a pool of worker threads. Tk is not thread safe, so finished decodes are
+    queued by the workers and handed to their containers from the tk main loop, which polls the queue using after().
+    Progress is reported through <<LoadProgress>> events with data '<done> <total>'. """
+    _poll_interval = 20  # ms
+    _workers = max(1, (cpu_count() or 2) - 1)
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='photon-loader')
+        self._done = Queue()
+        self._pending = {}
+        self._cancelled = set()
+        self._total = 0
+        self._finished = 0
+        self._polling = False
+
+    @property
+    def busy(self):
+        """ true if there are decodes that have not been handed to their container yet """
+        return bool(self._pending)
+
+    def submit(self, container):
+        """ decode the image of container in the background, the container is shown once the decode finishes.
+        Images that were decoded before are read from the proxy cache instead. """
+        future = self._executor.submit(self.level, container.image_path, container.size)
+        self._pending[future] = container
+        self._total += 1
+
+        # the callback runs on the worker thread, so it only queues the future
+        future.add_done_callback(self._done.put)
+
+        if not self._polling:
+            self._polling = True
+            self.canvas.after(self._poll_interval, self._poll)
+
+    def cancel(self, container=None):
+        """ cancel all outstanding decodes, or only that of container if given. Containers that did not finish
+        loading keep their placeholder and stay in the album. """
+        for future, c in self._pending.items():
+            if container is not None and c is not container:
+                continue
+
+            future.cancel()
+            self._cancelled.add(future)
+
+    def shutdown(self):
+        """ stop the worker threads without waiting for outstanding decodes """
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def pyramid(path):
+        """ the cache key of the proxies of the image at path and a function that reads them. Images are cached by
+        their source key, so registered exact duplicates share their proxies from the first time they are loaded. The
+        proxies of images inside a packed album are read from the album, which stores identical images once. """
+        if (packed := split(path)) is not None:
+            album, member = packed
+            return f'{file_identity(album)}|{member}', lambda: PackedAlbum.open(album).proxies(member)
+
+        key = source_key(path)
+        return key, lambda: proxy_cache.load(path, key)
+
+    @classmethod
+    def level(cls, path, size):
+        """ acquire the smallest proxy level of the image at path that covers size from the shared image cache, may
+        run on a worker thread. The compressed pyramid is cached too, but it is not held, so only the decoded level
+        stays in memory while it is displayed. Returns the key of the level, which is the key of the pyramid and the
+        index of the level, the sizes of all levels and the level itself. """
+        key, factory = cls.pyramid(path)
+        pyramid = image_cache.get(key, factory)
+        level_key = (key, pyramid.level_index(size))
+        return level_key, pyramid.sizes, image_cache.acquire(level_key, lambda: pyramid.level(level_key[1]))
+
+    def _poll(self):
+        """ hand all finished decodes to their containers and report the progress """
+        while True:
+            try:
+                future = self._done.get_nowait()
+            except Empty:
+                break
+
+            container = self._pending.pop(future)
+            self._finished += 1
+
+            if future in self._cancelled or future.cancelled():
+                self._cancelled.discard(future)
+                container.stop()
+
+                # the decode may have finished before it was cancelled, in which case its level was acquired
+                if not future.cancelled() and future.exception() is None:
+                    image_cache.release(future.result()[0])
+            elif future.exception() is not None:
+                error(f'could not load {container.image_path}: {future.exception()}')
+                container.stop(failed=True)
+            else:
+                container.show(*future.result())
+
+        self.canvas.event_generate('<<LoadProgress>>', data=f'{self._finished} {self._total}', when='tail')
+
+        if self._pending:
+            self.canvas.after(self._poll_interval, self._poll)
+        else:
+            # all done, the next batch of decodes starts counting from zero
+            debug(f'image cache: {image_cache.stats}')
+            self._polling = False
+            self._total = 0
+            self._finished = 0
@@ -0,0 +1,294 @@
+"""
+Journaling of the edits of an album, for autosaving and recovery after a crash
+
+Every edit is appended to a journal next to the album as a single line of json, so saving an edit costs the size of
+the edit rather than that of the album. The journal is compacted into the album every so often, except for packed
+albums, which hold their source images and are only written when they are saved as. Their edits stay in the journal,
+which is replayed whenever the album is read. When a session does not end cleanly, the album is rebuilt on the next
+launch by replaying its journal onto it.
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from logging import debug, error, warning
+from os import fsync, remove
+from os.path import abspath, exists
+from pathlib import Path
+from queue import Queue, Empty
+from threading import Thread
+
+from base.album import identify
+from handlers.album_pack import read_album, write_album, PACKED_EXTENSION
+
+# the suffix of the journal next to an album
+SUFFIX = '.journal'
+
+# queued by truncate, the journal is emptied once everything queued before it is written
+_TRUNCATE = object()
+
+# writes packed albums in the background, as packing reads all source images of the album
+packer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='photon-pack')
+
+
+def journal_path(album):
+    """ the path of the journal of album """
+    return f'{abspath(album)}{SUFFIX}'
+
+
+def replay(content, records):
+    """ apply the journaled records to the placements of an album, the records hold the full placement of a container
+    so replaying a record more than once has no further effect """
+    placements = {c['uid']: c for c in identify(content)}
+
+    for record in records:
+        op, placement = record['op'], {k: v for k, v in record.items() if k != 'op'}
+
+        if op == 'delete':
+            placements.pop(placement['uid'], None)
+        elif op == 'place':
+            placements[placement['uid']] = placement
+        elif op == 'transform' and placement['uid'] in placements:
+            placements[placement['uid']].update(placement)
+
+    return list(placements.values())
+
+
+class Journal:
+    """ An append-only file of json records. Records are written on a background thread, which writes all records
+    queued since its last write at once and syncs them to disk. """
+    _flush_interval = 0.5  # s, the longest time a record waits before it is written
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._queue = Queue()
+        self._thread = Thread(target=self._write, name='photon-journal', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def read(path):
+        """ the records in the journal at path. A record that was only partially written when the session crashed ends
+        the journal. """
+        records = []
+        if not exists(path):
+            return records
+
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    warning(f'ignoring the partially written end of {path}')
+                    break
+
+        return records
+
+    def append(self, record):
+        """ queue a record to be written """
+        self._queue.put(json.dumps(record))
+
+    def truncate(self):
+        """ empty the journal once all records that are queued have been written """
+        self._queue.put(_TRUNCATE)
+
+    def close(self):
+        """ write all queued records and stop the background thread """
+        self._queue.put(None)
+        self._thread.join()
+
+    def _write(self):
+        """ write queued records until closed, runs on the background thread """
+        with open(self.path, 'a') as f:
+            while True:
+                try:
+                    items = [self._queue.get(timeout=self._flush_interval)]
+                except Empty:
+                    continue
+
+                # everything queued in the meantime is written and synced at once
+                while not self._queue.empty():
+                    items.append(self._queue.get_nowait())
+
+                for item in items:
+                    if item is None:
+                        break
+                    if item is _TRUNCATE:
+                        f.flush()
+                        f.truncate(0)
+                    else:
+                        f.write(f'{item}\n')
+
+                f.flush()
+                fsync(f.fileno())
+
+                if None in items:
+                    return
+
+
+class Autosave:
+    """ Journals the edits of the album on a canvas and compacts them into the album, after a number of edits or a
+    while after the last compaction. Albums that were not saved yet are autosaved to an untitled album in the cache.
+
+    While a session is running, a session file points to its album. The session file is removed when the session ends
+    cleanly, so if it exists on launch, the album is recovered from its journal.
+
+    A packed album holds the source images, so it is not compacted periodically, its edits stay in its journal until
+    it is saved as. It is then written in the background, and its journal is emptied once it is written. The records
+    journaled in the meantime are journaled again. """
+    _directory = Path.home() / '.cache' / 'photon'
+    _untitled = 'untitled.hv'
+    _session = 'session.json'
+    _compact_every = 256  # records
+    _compact_interval = 60_000  # ms
+    _poll_interval = 100  # ms, of the packing of an album
+
+    def __init__(self, canvas, directory=None):
+        self.canvas = canvas
+        self.directory = Path(directory or self._directory)
+        self.album = None
+        self.journal = None
+        self.pending = 0  # records written since the last compaction
+        # the packing of an album in progress: its future, its journal, the records journaled since it started and the
+        # number of records it compacts
+        self._packing = None
+
+        self.canvas.after(self._compact_interval, self._tick)
+
+    @property
+    def session_path(self):
+        """ the path of the session file """
+        return self.directory / self._session
+
+    def attach(self, album=None):
+        """ journal the edits of the canvas next to album, or next to the untitled album if None. The edits of the
+        previous album are compacted into it first. """
+        self.detach()
+        album = abspath(album) if album else str(self.directory / self._untitled)
+
+        # the journal of an album that is being packed is emptied once it is packed, so that is waited for first
+        if self._packing is not None and self._packing[1].path == Path(journal_path(album)):
+            self._finish(wait=True)
+
+        self.album = album
+        self.journal = Journal(journal_path(self.album))
+        self.pending = len(Journal.read(journal_path(self.album)))
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.session_path.write_text(json.dumps({'album': self.album}))
+
+    def detach(self):
+        """ compact the journal into the album, if there are edits, and stop journaling. While an album is being
+        packed, edits are left in its journal, which is replayed when the album is loaded, and the journal is closed
+        once the album is packed. """
+        if self.journal is None:
+            return
+
+        if self.pending and self._packing is None:
+            self.compact()
+
+        if self._packing is None or self._packing[1] is not self.journal:
+            self.journal.close()
+        self.journal = None
+
+    def close(self):
+        """ end the session cleanly, nothing is recovered on the next launch """
+        self.detach()
+
+        if self._packing is not None:
+            self._finish(wait=True)
+
+        if self.session_path.exists():
+            remove(self.session_path)
+
+    def record(self, op, placement):
+        """ journal an edit of a container: its 'place'ment, a 'transform' or its 'delete'ion """
+        if self.journal is None:
+            return
+
+        record = {'op': op, **placement}
+        self.journal.append(record)
+        self.pending += 1
+
+        if self._packing is not None and self._packing[1] is self.journal:
+            self._packing[2].append(record)
+
+        if self.pending >= self._compact_every and self._packing is None:
+            self.compact()
+
+    def compact(self, pack=False):
+        """ write the album from the canvas and empty the journal. A packed album is only written if pack is true, e.g.
+        when it is saved as, as writing it reads all of its source images. It is written in the background, one album
+        is packed at a time. Otherwise the edits of a packed album stay in its journal. """
+        if self.journal is None or self.album.endswith(PACKED_EXTENSION) and not pack:
+            return
+
+        if self._packing is not None:
+            self._finish(wait=True)
+
+        content = self.canvas.album.to_content()
+
+        if self.album.endswith(PACKED_EXTENSION):
+            self._packing = (packer.submit(write_album, self.album, content), self.journal, [], self.pending)
+            self.pending = 0
+            self.canvas.after(self._poll_interval, self._finish)
+            return
+
+        write_album(self.album, content)
+        self.journal.truncate()
+        debug(f'compacted {self.pending} journaled edits into {self.album}')
+        self.pending = 0
+
+    def load(self, album):
+        """ the placements of the album, with the edits in its journal replayed onto them """
+        content = read_album(album) if exists(album) else []
+        return replay(content, Journal.read(journal_path(album)))
+
+    def recover(self):
+        """ rebuild the album of a session that did not end cleanly, returns whether there was one """
+        from handlers.file_handling import place_album
+
+        if not self.session_path.exists():
+            return False
+
+        album = json.loads(self.session_path.read_text())['album']
+        debug(f'recovering {album}')
+
+        self.canvas.clear()
+        place_album(self.canvas, self.load(album))
+        self.attach(album)
+        return True
+
+    def _finish(self, wait=False):
+        """ empty the journal of the album that was packed, and journal the records since the packing started again.
+        Polls until the album is packed, unless waiting for it. If packing failed, the journal is kept. """
+        if self._packing is None:
+            return
+
+        future, journal, records, pending = self._packing
+        if not wait and not future.done():
+            self.canvas.after(self._poll_interval, self._finish)
+            return
+
+        self._packing = None
+
+        if future.exception() is not None:
+            error(f'could not pack the album: {future.exception()}')
+            if journal is self.journal:
+                self.pending += pending
+        else:
+            # records hold the full placement, so journaling them again after the album has them is harmless
+            journal.truncate()
+            [journal.append(r) for r in records]
+            debug(f'compacted {pending} journaled edits into a packed album')
+
+        if journal is not self.journal:
+            journal.close()
+
+    def _tick(self):
+        """ compact periodically, if there are edits """
+        if self.pending and self._packing is None:
+            self.compact()
+
+        self.canvas.after(self._compact_interval, self._tick)
@@ -0,0 +1,156 @@
+"""
+Automatic layout of photos on the pages of a photobook
+
+The photos are laid out on pages of a fixed size, which are pages of the album and are stacked below each other on the
+canvas. Only the headers of the photos are read, to find their size and orientation, so a layout of thousands of
+photos takes well under a second.
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from concurrent.futures import ThreadPoolExecutor
+from logging import error
+from os import cpu_count
+
+from handlers.album_pack import open_image
+from handlers.image_handling import oriented_size, fit
+
+JUSTIFIED = 'justified'
+GRID = 'grid'
+
+PAGE_SIZE = (1600, 1200)  # px on the canvas
+ROW_HEIGHT = 320  # px, the height rows are justified towards
+COLUMNS = 4  # photos per row of a grid
+MARGIN = 40  # px around the photos on a page
+SPACING = 12  # px between photos
+PAGE_GAP = 80  # px between pages on the canvas
+PLACED_EDGE = 512  # px, the long edge of an image that is placed on its own
+
+
+def read_size(path):
+    """ the size of the image at path as it is displayed, from its header only """
+    with open_image(path) as image:
+        return oriented_size(image)
+
+
+def placed_size(path, edge=PLACED_EDGE):
+    """ the size of the image at path when it is placed on its own, e.g. by an album that was saved without sizes """
+    return fit(read_size(path), edge)
+
+
+def read_sizes(paths, workers=None):
+    """ the displayed sizes of the images at paths by path, the headers are read concurrently. Images that cannot be
+    read are left out. """
+    def read(path):
+        try:
+            return read_size(path)
+        except (OSError, ValueError) as e:
+            error(f'could not read {path}: {e}')
+
+    with ThreadPoolExecutor(max_workers=workers or min(32, 4 * (cpu_count() or 1))) as executor:
+        return {p: size for p, size in zip(paths, executor.map(read, paths)) if size is not None}
+
+
+def justified(sizes, width, height=ROW_HEIGHT, spacing=SPACING):
+    """ break the images into rows that exactly fill width, keeping their aspect ratios. The breaks are chosen by
+    dynamic programming to keep the height of every row as close to height as possible, considering only rows between
+    half and twice that height, so the cost grows linearly with the number of images. The last row is not stretched.
+    Returns the rows as lists of (index, x, w, h). """
+    aspects = [w / h for w, h in sizes]
+    n = len(aspects)
+
+    # cost[i] is the cost of the best layout of the images from i onwards, which starts with a row up to end[i]
+    cost = [0.0] * (n + 1)
+    end = [n] * (n + 1)
+
+    for i in range(n - 1, -1, -1):
+        cost[i] = float('inf')
+        total = 0
+
+        for j in range(i, n):
+            total += aspects[j]
+            row = (width - spacing * (j - i)) / total
+
+            # the last row keeps the target height if it is too short to fill the width
+            c = 0 if j == n - 1 and row >= height else (row - height) ** 2
+
+            if c + cost[j + 1] < cost[i]:
+                cost[i], end[i] = c + cost[j + 1], j + 1
+
+            if row < height / 2:
+                break
+
+    rows = []
+    i = 0
+    while i < n:
+        j = end[i]
+        total = sum(aspects[i:j])
+        h = min(height, (width - spacing * (j - i - 1)) / total) if j == n else (width - spacing * (j - i - 1)) / total
+
+        # positions are rounded cumulatively, so the rounding errors do not add up along the row
+        row, x = [], 0.0
+        for k in range(i, j):
+            left = round(x)
+            x += aspects[k] * h
+            row.append((k, left, max(1, round(x) - left), max(1, round(h))))
+            x += spacing
+
+        rows.append(row)
+        i = j
+
+    return rows
+
+
+def grid(sizes, width, columns=COLUMNS, spacing=SPACING):
+    """ place the images in rows of square cells that fill width, each image fit and centred in its cell. Returns the
+    rows as lists of (index, x, w, h). """
+    cell = (width - spacing * (columns - 1)) / columns
+    rows = []
+
+    for start in range(0, len(sizes), columns):
+        row = []
+        for column, k in enumerate(range(start, min(start + columns, len(sizes)))):
+            w, h = fit(sizes[k], int(cell)) if max(sizes[k]) > cell else sizes[k]
+            row.append((k, round(column * (cell + spacing) + (cell - w) / 2), w, h))
+
+        rows.append(row)
+
+    return rows
+
+
+def paginate(rows, page_size=PAGE_SIZE, margin=MARGIN, spacing=SPACING):
+    """ stack the rows on pages, starting a new page when a row does not fit on the current one. Returns the
+    placement of every image as (index, page, x, y, w, h), in pixels from the top left of its page """
+    _, page_height = page_size
+    placements = []
+    page, y = 0, margin
+
+    for row in rows:
+        height = max(h for _, _, _, h in row)
+
+        if y > margin and y + height > page_height - margin:
+            page, y = page + 1, margin
+
+        placements.extend((k, page, margin + x, y, w, h) for k, x, w, h in row)
+        y += height + spacing
+
+    return placements
+
+
+def layout(sizes, style=JUSTIFIED, origin=(0, 0), page_size=PAGE_SIZE, margin=MARGIN, spacing=SPACING):
+    """ lay out images of the given sizes in the style on as many pages as needed. The pages are stacked from origin
+    down the canvas. Returns the bounds (x, y, w, h) of every image and the index of its page, both in the order of
+    sizes, and the frame (left, top, right, bottom) of every page """
+    width = page_size[0] - 2 * margin
+    rows = justified(sizes, width, spacing=spacing) if style == JUSTIFIED else grid(sizes, width, spacing=spacing)
+    placements = sorted(paginate(rows, page_size, margin, spacing))
+
+    ox, oy = origin
+    step = page_size[1] + PAGE_GAP
+    bounds = [(ox + x, oy + page * step + y, w, h) for _, page, x, y, w, h in placements]
+    pages = [page for _, page, *_ in placements]
+    frames = [
+        (ox, oy + page * step, ox + page_size[0], oy + page * step + page_size[1])
+        for page in range(1 + max(pages, default=-1))
+    ]
+    return bounds, pages, frames
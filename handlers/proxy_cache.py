@@ -0,0 +1,246 @@
+"""
+Persistent on-disk cache of the display proxies of source images
+
+The proxies of an image are stored in a single file, preceded by a small header that holds the offset and length of
+each level. Each level is stored compressed, as a jpeg, or as a png if it has transparency. Reading a cached pyramid is
+a memory map and a copy of the compressed levels, a level is only decoded once it is displayed.
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from collections import Counter
+from hashlib import sha1
+from io import BytesIO
+from logging import debug, warning
+from mmap import mmap, ACCESS_READ
+from os import scandir, stat, utime, replace, remove, fdopen
+from os.path import abspath
+from pathlib import Path
+from struct import Struct
+from tempfile import mkstemp
+from threading import Lock
+from PIL import Image
+
+from handlers.image_handling import ProxyPyramid, PROXY_LEVELS
+
+MAGIC = b'PHPX'
+VERSION = 2
+
+# magic, version, source width, source height, number of levels
+HEADER = Struct('<4sHIIH')
+# width, height, offset of the compressed level from the start of the pyramid, length of the compressed level
+LEVEL = Struct('<IIQQ')
+# mode, width, height, offset of the raw pixel data, as written by version 1, which packed albums may still hold
+RAW_LEVEL = Struct('<4sIIQ')
+
+# the quality that levels without transparency are stored at
+QUALITY = 90
+
+
+def file_identity(path):
+    """ identify a file by its absolute path, size and modification time """
+    path = abspath(path)
+    st = stat(path)
+    return f'{path}|{st.st_size}|{st.st_mtime_ns}'
+
+
+# the content digests of files by their identity
+_digests = {}
+
+# the sizes of the source files in use by their absolute path, and the number of sources of each size
+_sources = {}
+_sizes = Counter()
+
+
+def content_digest(path):
+    """ the sha1 of the content of the file at path. Digests are remembered by the identity of the file, so a file is
+    only hashed again once it changes """
+    identity = file_identity(path)
+
+    if identity not in _digests:
+        digest = sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        _digests[identity] = digest.hexdigest()
+
+    return _digests[identity]
+
+
+def register(paths):
+    """ register the files at paths as sources of images, before their images are loaded. Only the size of each file
+    is read. Files that no longer exist are skipped, their images fail to load. """
+    for path in map(abspath, paths):
+        try:
+            size = stat(path).st_size
+        except OSError:
+            continue
+
+        if (previous := _sources.get(path)) is not None:
+            _sizes[previous] -= 1
+        _sources[path] = size
+        _sizes[size] += 1
+
+
+def source_key(path):
+    """ the key that the proxies of the file at path are cached by. Exact duplicates always have the same size, so a
+    file whose size is shared by another registered source is keyed by the digest of its content, which lets its
+    duplicates share its proxies. Other files are keyed by their identity, they are not read to key them. """
+    path = abspath(path)
+    size = stat(path).st_size
+    shared = _sizes[size] - (_sources.get(path) == size)
+    return content_digest(path) if shared > 0 else file_identity(path)
+
+
+def encode(level):
+    """ compress a level, levels with transparency are stored lossless """
+    if isinstance(level, bytes):
+        return level
+
+    buffer = BytesIO()
+    if level.mode == 'RGB':
+        level.save(buffer, 'JPEG', quality=QUALITY)
+    else:
+        level.save(buffer, 'PNG', compress_level=1)
+    return buffer.getvalue()
+
+
+def pack_pyramid(pyramid):
+    """ serialize a pyramid to bytes, levels that are still compressed are not compressed again """
+    offset = HEADER.size + LEVEL.size * len(pyramid.levels)
+    header = [HEADER.pack(MAGIC, VERSION, *pyramid.source_size, len(pyramid.levels))]
+    data = []
+
+    for size, level in zip(pyramid.sizes, pyramid.levels):
+        encoded = encode(level)
+        header.append(LEVEL.pack(*size, offset, len(encoded)))
+        data.append(encoded)
+        offset += len(encoded)
+
+    return b''.join(header + data)
+
+
+def unpack_pyramid(buffer):
+    """ deserialize a pyramid from a bytes-like object, such as a memory map. The compressed levels are copied out of
+    the buffer, they are decoded when they are needed. Pyramids of version 1 hold raw pixel data, which is copied into
+    images right away. """
+    magic, version, width, height, n = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version not in (1, VERSION):
+        raise ValueError('not a proxy pyramid')
+
+    if version == 1:
+        levels = []
+        for i in range(n):
+            mode, w, h, offset = RAW_LEVEL.unpack_from(buffer, HEADER.size + RAW_LEVEL.size * i)
+            mode = mode.decode().strip()
+            levels.append(Image.frombytes(mode, (w, h), buffer[offset:offset + len(mode) * w * h]))
+
+        return ProxyPyramid((width, height), levels)
+
+    levels, sizes = [], []
+    for i in range(n):
+        w, h, offset, length = LEVEL.unpack_from(buffer, HEADER.size + LEVEL.size * i)
+        levels.append(bytes(buffer[offset:offset + length]))
+        sizes.append((w, h))
+
+    return ProxyPyramid((width, height), levels, sizes)
+
+
+class ProxyCache:
+    """ A directory of pyramid files, keyed by the source key of their image, so exact duplicates share a pyramid file.
+    The total size of the directory is capped, when it grows beyond the cap the least recently used pyramids are
+    evicted. Recency is tracked through the modification time of the pyramid files, which is bumped on every hit. The
+    compressed pyramid of a photo takes up to about 2 MB, so the default cap holds at least 1000 photos. """
+    _directory = Path.home() / '.cache' / 'photon' / 'proxies'
+    _max_bytes = 2 << 30
+    _suffix = '.pxy'
+    _revision = 3  # of the way pyramids are built, pyramids built by an earlier revision are not used
+
+    def __init__(self, directory=None, max_bytes=None, levels=PROXY_LEVELS):
+        self.directory = Path(directory or self._directory)
+        self.max_bytes = max_bytes or self._max_bytes
+        self.levels = levels
+        self._lock = Lock()
+
+    def file(self, key):
+        """ the pyramid file of the source with key """
+        return self.directory / f'{sha1(f"{key}|{self.levels}|{self._revision}".encode()).hexdigest()}{self._suffix}'
+
+    def get(self, key):
+        """ return the cached pyramid of the source with key, or None if it is not cached """
+        file = self.file(key)
+
+        try:
+            with open(file, 'rb') as f, mmap(f.fileno(), 0, access=ACCESS_READ) as mm, memoryview(mm) as view:
+                pyramid = unpack_pyramid(view)
+
+            # mark as recently used
+            utime(file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        return pyramid
+
+    def put(self, key, data):
+        """ store the packed pyramid of the source with key """
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # write to a temporary file first, so no partially written pyramids can be read by other threads
+        fd, tmp = mkstemp(dir=self.directory)
+        with fdopen(fd, 'wb') as f:
+            f.write(data)
+        replace(tmp, self.file(key))
+
+        self.evict()
+
+    def load(self, path, key=None):
+        """ return the pyramid for the image at path, from the cache if possible. Otherwise decode and cache it. The
+        levels of the returned pyramid are compressed either way, so it holds as little memory as a cached one. The
+        pyramid is cached under the source key of path, unless another key is given. """
+        key = key or source_key(path)
+        if (pyramid := self.get(key)) is not None:
+            return pyramid
+
+        data = pack_pyramid(ProxyPyramid.from_path(path, self.levels))
+
+        try:
+            self.put(key, data)
+        except OSError as e:
+            warning(f'could not cache the proxies of {path}: {e}')
+
+        return unpack_pyramid(data)
+
+    def evict(self):
+        """ remove the least recently used pyramids until the cache is within its size cap """
+        with self._lock:
+            files = sorted(self._files(), key=lambda e: e.stat().st_mtime_ns)
+            total = sum(e.stat().st_size for e in files)
+
+            while files and total > self.max_bytes:
+                entry = files.pop(0)
+                total -= entry.stat().st_size
+                self._remove(entry.path)
+                debug(f'evicted {entry.name} from the proxy cache')
+
+    def clear(self):
+        """ remove all pyramids from the cache """
+        with self._lock:
+            [self._remove(e.path) for e in self._files()]
+
+    def _files(self):
+        """ the pyramid files in the cache directory """
+        if not self.directory.exists():
+            return []
+
+        return [e for e in scandir(self.directory) if e.name.endswith(self._suffix)]
+
+    @staticmethod
+    def _remove(path):
+        """ remove a file, ignoring files that were already removed by someone else """
+        try:
+            remove(path)
+        except FileNotFoundError:
+            pass
+
+
+proxy_cache = ProxyCache()
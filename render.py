@@ -0,0 +1,115 @@
+"""
+Render albums to images from the command line, without a display
+
+    python render.py album.hv --dpi 300 --format png --out dir/
+
+Every page of the albums is rendered to an image, on worker processes. Neither tkinter nor the editor is imported, so
+it runs on servers without a display. A json summary of the outputs and the timing is written to stdout. The exit code
+is 0 if all pages were rendered, 1 if rendering any of them failed, 2 for invalid arguments and 3 if an album could not
+be read.
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+import json
+import sys
+from argparse import ArgumentParser
+from logging import basicConfig, StreamHandler, error
+from os import makedirs
+from os.path import basename, splitext
+from time import perf_counter
+from zipfile import BadZipFile
+
+from base.album import Album
+from handlers.album_pack import read_album
+from handlers.batch_export import BatchExporter, Page, Target, SUFFIXES
+from handlers.compositor import DEFAULT_DPI
+from handlers.journal import Journal, journal_path, replay
+from handlers.layout import placed_size
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2  # exited with by argparse
+EXIT_UNREADABLE = 3
+
+
+def parse(argv=None):
+    """ the command line arguments """
+    parser = ArgumentParser(description='render photon albums to images')
+    parser.add_argument('albums', nargs='+', help='the .hv or .hvz albums to render')
+    parser.add_argument('--out', default='.', help='the directory the images are written to')
+    parser.add_argument('--format', default='png', type=str.upper, choices=list(SUFFIXES))
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--dpi', type=int, help=f'the resolution of the images, {DEFAULT_DPI} by default')
+    size.add_argument('--edge', type=int, help='fit the long edge of the images to this number of pixels instead')
+    parser.add_argument('--quality', type=int, help='the quality of jpeg and webp images')
+    parser.add_argument('--workers', type=int, help='the number of worker processes, one per cpu by default')
+    parser.add_argument('--memory', type=int, metavar='MB',
+                        help='the memory per worker in MB, larger images are rendered through a file')
+    parser.add_argument('--serial', action='store_true', help='render in this process rather than on workers')
+    parser.add_argument('--log-level', default='WARNING', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    return parser.parse_args(argv)
+
+
+def read_pages(albums):
+    """ the pages of the albums, named after their album and numbered if it has more than one. Images of albums that
+    were saved without their size are sized as the editor places them. The edits in the journal of an album, e.g. of
+    a packed album that was edited since it was saved, are replayed onto it. """
+    pages = []
+    for album in albums:
+        content = replay(read_album(album), Journal.read(journal_path(album)))
+        content = [{**c, 'size': c.get('size') or placed_size(c['image'])} for c in content]
+        pages.extend(Page.from_album(Album.from_content(content), splitext(basename(album))[0]))
+
+    return pages
+
+
+def main(argv=None):
+    args = parse(argv)
+    basicConfig(level=args.log_level, handlers=[StreamHandler()], force=True)
+
+    try:
+        pages = read_pages(args.albums)
+    except (OSError, ValueError, KeyError, BadZipFile) as e:
+        error(f'could not read the album: {e}')
+        return EXIT_UNREADABLE
+
+    dpi = None if args.edge else args.dpi or DEFAULT_DPI
+    params = (('quality', args.quality),) if args.quality else ()
+    target = Target(f'{args.edge}px' if args.edge else f'{dpi}dpi', args.format, dpi, args.edge, params)
+
+    makedirs(args.out, exist_ok=True)
+    exporter = BatchExporter(args.workers, args.memory and args.memory << 20)
+    start = perf_counter()
+
+    try:
+        exporter.export(pages, [target], args.out, serial=args.serial)
+    except Exception as e:
+        # the export finishes the other pages first, the errors of all pages are reported below
+        error(f'could not render: {e}')
+    finally:
+        exporter.shutdown()
+
+    outputs, errors = [], []
+    for page, future in zip(pages, exporter.futures):
+        if future.exception() is not None:
+            errors.append(dict(page=page.name, error=str(future.exception())))
+        else:
+            path, nbytes = future.result()
+            outputs.append(dict(page=page.name, path=path, bytes=nbytes))
+
+    seconds = perf_counter() - start
+    print(json.dumps(dict(
+        outputs=outputs,
+        errors=errors,
+        workers=1 if args.serial else exporter.workers,
+        seconds=seconds,
+        pages_per_s=len(outputs) / seconds,
+        mb_per_s=sum(o['bytes'] for o in outputs) / seconds / (1 << 20),
+    ), indent=2))
+
+    return EXIT_FAILED if errors else EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,17 +4,43 @@ Run the program
 author: David den Uyl (djdenuyl@gmail.com)
 date: 2022-01-19
 """
-from logging import basicConfig, DEBUG, StreamHandler
+from argparse import ArgumentParser
+from logging import basicConfig, StreamHandler
+from base.tracing import tracer, timeline
 from components.application import Application
 
 
 if __name__ == '__main__':
+    parser = ArgumentParser(description='the photon photobook editor')
+    parser.add_argument('--log-level', default='WARNING', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    parser.add_argument('--trace', action='store_true', help='record the latency of the event handlers, they are '
+                                                             'written to a file on ctrl+shift+t and on exit')
+    parser.add_argument('--watchdog', type=int, nargs='?', const=100, metavar='MS',
+                        help='log the stacks of main loop stalls longer than MS ms, 100 by default')
+    parser.add_argument('--proxy-cache', type=float, metavar='GB',
+                        help='the size the on-disk cache of image proxies is capped at, 2 GB by default')
+    parser.add_argument('--image-cache', type=int, metavar='MB',
+                        help='the memory budget of the images decoded for display, 512 MB by default')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='print a timeline of the startup and exit, run with python -X importtime for the time '
+                             'spent importing each module')
+    args = parser.parse_args()
+
     basicConfig(
-        level=DEBUG,
+        level=args.log_level,
         handlers=[
             StreamHandler()
         ],
         force=True
     )
 
-    app = Application()
+    # handlers are traced when they are bound, so tracing is enabled before the application is built
+    tracer.enabled = args.trace
+    timeline.enabled = args.profile_startup
+    timeline.mark('imported')
+
+    app = Application(
+        watchdog=args.watchdog and args.watchdog / 1000,
+        proxy_cache_size=args.proxy_cache and int(args.proxy_cache * (1 << 30)),
+        image_cache_size=args.image_cache and args.image_cache << 20,
+    )
@@ -0,0 +1,425 @@
+"""
+Benchmarks of the hot paths of the editor: importing, opening, dragging, resizing, saving and exporting albums
+
+Synthetic albums of photos at a realistic resolution are generated once and reused. Every case runs in a fresh
+process, so its peak memory is its own. The headless cases run against the document model and the image handlers,
+the gui cases drive the canvas and need a display, e.g. a virtual one through `xvfb-run`.
+
+    python -m test.benchmark --sizes 10 100 1000 --output benchmark.json
+    python -m test.benchmark --baseline benchmark.json --output current.json
+
+When a baseline is given, the wall times and latencies are compared against it and the exit code is 1 if any case
+regressed by more than the tolerance.
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+import json
+import sys
+from argparse import ArgumentParser
+from multiprocessing import get_context
+from os import environ, chdir, makedirs
+from os.path import join, exists
+from pathlib import Path
+from platform import platform, python_version
+from statistics import quantiles
+from tempfile import mkdtemp
+from time import perf_counter
+
+from PIL import Image, ImageDraw
+
+RESOLUTION = (4000, 3000)  # a 12 MP photo
+SIZES = (10, 100, 1000)
+EVENTS = 200  # motion events in a scripted drag or resize
+COLUMNS = 10  # photos per row in a synthetic album
+DATA = Path.home() / '.cache' / 'photon' / 'benchmark'
+
+
+def peak_rss_mb():
+    """ the peak resident memory of this process, in MB """
+    from resource import getrusage, RUSAGE_SELF
+
+    rss = getrusage(RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == 'darwin' else rss / (1 << 10)
+
+
+def percentiles(latencies):
+    """ the 50th, 90th and 99th percentile and the maximum of latencies in seconds, in ms """
+    if len(latencies) < 2:
+        return {}
+
+    q = quantiles(latencies, n=100, method='inclusive')
+    return dict(p50=1000 * q[49], p90=1000 * q[89], p99=1000 * q[98], max=1000 * max(latencies))
+
+
+def has_display():
+    """ check whether tk can open a window """
+    return sys.platform in ('win32', 'darwin') or bool(environ.get('DISPLAY'))
+
+
+def generate(directory, n, resolution=RESOLUTION):
+    """ generate an album of n photos at resolution in directory and return its path. Every photo is stamped with its
+    index, so their content differs and each of them is decoded, rather than shared through the content keyed
+    caches. """
+    width, height = resolution
+    album = join(directory, f'album-{n}-{width}x{height}.hv')
+    if exists(album):
+        return album
+
+    photos = join(directory, f'photos-{width}x{height}')
+    makedirs(photos, exist_ok=True)
+
+    from handlers.image_handling import fit
+    w, h = fit(resolution, 512)
+
+    source = None
+    content = []
+    for i in range(n):
+        path = join(photos, f'{i:04d}.jpg')
+        if not exists(path):
+            if source is None:
+                bands = [Image.effect_noise(resolution, sigma) for sigma in (32, 48, 64)]
+                gradient = Image.linear_gradient('L').resize(resolution)
+                source = Image.merge('RGB', [Image.blend(b, gradient, 0.5) for b in bands])
+
+            stamp(source.copy(), i).save(path, quality=90)
+
+        row, column = divmod(i, COLUMNS)
+        content.append({'image': path, 'location': [10 + column * (w + 16), 10 + row * (h + 16)], 'size': [w, h]})
+
+    with open(album, 'w') as f:
+        f.write(json.dumps(content))
+
+    return album
+
+
+def stamp(image, i, bits=16):
+    """ stamp i in binary onto the top of the image, as a row of black and white squares """
+    side = max(8, image.width // (2 * bits))
+    draw = ImageDraw.Draw(image)
+    for bit in range(bits):
+        draw.rectangle((bit * side, 0, (bit + 1) * side - 1, side - 1), fill='white' if i >> bit & 1 else 'black')
+
+    return image
+
+
+def isolate(workdir):
+    """ point the caches and the autosave of this process to workdir, so every case starts cold and does not touch the
+    files of the user """
+    from handlers.proxy_cache import proxy_cache
+    from handlers.journal import Autosave
+
+    proxy_cache.directory = Path(workdir) / 'proxies'
+    Autosave._directory = Path(workdir) / 'autosave'
+
+    # the canvas loads data/test.hv relative to the working directory on start
+    makedirs(join(workdir, 'data'), exist_ok=True)
+    with open(join(workdir, 'data', 'test.hv'), 'w') as f:
+        f.write('[]')
+    chdir(workdir)
+
+
+# headless cases, against the document model and the image handlers
+
+def model_open(album, workdir):
+    """ read an album into the document model """
+    from base.album import Album
+    from handlers.album_pack import read_album
+
+    Album.from_content(read_album(album))
+
+
+def model_import(album, workdir):
+    """ decode the proxies of every photo in the album, as the loader does on import """
+    from handlers.album_pack import read_album
+    from handlers.proxy_cache import proxy_cache
+
+    latencies = []
+    for c in read_album(album):
+        start = perf_counter()
+        proxy_cache.load(c['image'])
+        latencies.append(perf_counter() - start)
+
+    return latencies
+
+
+def model_drag(album, workdir):
+    """ move a placement in small steps, updating the model and the spatial index as a drag does """
+    from base.album import Album
+    from handlers.album_pack import read_album
+    from base.spatial_index import SpatialIndex
+
+    page = Album.from_content(read_album(album)).pages[0]
+    index = SpatialIndex()
+    [index.insert(p.uid, p.bbox) for p in page]
+    placement = next(iter(page))
+
+    latencies = []
+    for _ in range(EVENTS):
+        start = perf_counter()
+        placement.x += 3
+        placement.y += 2
+        index.update(placement.uid, placement.bbox)
+        index.query_rect(*placement.bbox)
+        latencies.append(perf_counter() - start)
+
+    return latencies
+
+
+def model_resize(album, workdir):
+    """ render previews of a photo at growing sizes from its decoded proxy level, as a resize does """
+    from handlers.album_pack import read_album
+    from handlers.image_loader import ImageLoader
+
+    content = read_album(album)[0]
+    w, h = content['size']
+    _, _, level = ImageLoader.level(content['image'], (w, h))
+
+    latencies = []
+    for i in range(EVENTS):
+        start = perf_counter()
+        level.resize((w + i, h + i), Image.NEAREST)
+        latencies.append(perf_counter() - start)
+
+    return latencies
+
+
+def model_save(album, workdir):
+    """ write the document model to an album """
+    from base.album import Album
+    from handlers.album_pack import read_album, write_album
+
+    write_album(join(workdir, 'saved.hv'), Album.from_content(read_album(album)).to_content())
+
+
+def model_export(album, workdir):
+    """ composite the album from its sources at screen resolution """
+    from base.album import Album
+    from handlers.album_pack import read_album
+    from handlers.compositor import Compositor, scene
+
+    layers, bounds = scene(Album.from_content(read_album(album)).pages[0])
+    Compositor(layers, bounds).save(join(workdir, 'export.png'))
+
+
+# gui cases, driving the canvas
+
+def canvas():
+    """ a canvas in a window, as the application creates it """
+    from tkinter import Tk
+    from components.main_canvas import MainCanvas
+
+    root = Tk()
+    main = MainCanvas(master=root, width=1200, height=800, bg='white')
+    main.pack()
+    root.update()
+    return main
+
+
+def wait_for_loader(main):
+    """ run the event loop until all images on the canvas are loaded """
+    main.update_viewport()
+    while main.loader.busy:
+        main.update()
+
+
+def event(x, y):
+    """ a mouse event at x, y """
+    from tkinter import Event, EventType
+
+    e = Event()
+    e.x, e.y, e.type = x, y, EventType.Motion
+    return e
+
+
+def gui_construct(album, workdir):
+    """ construct a container for every photo in the album """
+    from components.container import Container
+    from handlers.file_handling import read_album
+
+    main = canvas()
+    latencies = []
+    for c in read_album(album):
+        start = perf_counter()
+        main.containers.append(Container(main, c['image'], *c['location'], size=c['size']))
+        latencies.append(perf_counter() - start)
+
+    return latencies
+
+
+def gui_open(album, workdir):
+    """ open the album through the file opener and load the visible images """
+    import handlers.file_handling as file_handling
+
+    main = canvas()
+    file_handling.askopenfilename = lambda **_: album
+    file_handling.FileOpener(main).open()
+    wait_for_loader(main)
+
+
+def gui_drag(album, workdir):
+    """ drag a container through its draggable """
+    import handlers.file_handling as file_handling
+
+    main = canvas()
+    file_handling.place_album(main, file_handling.read_album(album))
+    wait_for_loader(main)
+
+    container = main.containers[0]
+    main.interaction.select(container)
+    container.draggable.on_press(event(0, 0))
+
+    latencies = []
+    for i in range(1, EVENTS + 1):
+        start = perf_counter()
+        container.draggable.on_move(event(3 * i, 2 * i))
+        main.scheduler.flush(container.draggable)
+        latencies.append(perf_counter() - start)
+
+    container.draggable.on_release(event(3 * EVENTS, 2 * EVENTS))
+    return latencies
+
+
+def gui_resize(album, workdir):
+    """ resize a container through the scale arrow at its bottom right """
+    from tkinter import NW
+    import handlers.file_handling as file_handling
+
+    main = canvas()
+    file_handling.place_album(main, file_handling.read_album(album))
+    wait_for_loader(main)
+
+    container = main.containers[0]
+    main.interaction.select(container)
+    arrow = next(a for a in main.interaction.handles.values() if a.anchor == NW)
+    arrow.on_click(event(0, 0))
+
+    latencies = []
+    for i in range(1, EVENTS + 1):
+        start = perf_counter()
+        arrow.on_move(event(2 * i, 2 * i))
+        main.scheduler.flush(arrow)
+        latencies.append(perf_counter() - start)
+
+    arrow.on_release(event(2 * EVENTS, 2 * EVENTS))
+    return latencies
+
+
+def gui_save(album, workdir):
+    """ save the album through the file saver """
+    import handlers.file_handling as file_handling
+
+    main = canvas()
+    file_handling.place_album(main, file_handling.read_album(album))
+    file_handling.asksaveasfilename = lambda **_: join(workdir, 'saved.hv')
+    file_handling.FileSaver(main).save_file_as()
+
+
+def gui_export(album, workdir):
+    """ export the album through the image exporter at screen resolution """
+    import handlers.file_handling as file_handling
+
+    main = canvas()
+    file_handling.place_album(main, file_handling.read_album(album))
+    file_handling.asksaveasfilename = lambda **_: join(workdir, 'export.png')
+    file_handling.askinteger = lambda *_, **__: round(main.winfo_fpixels('1i'))
+    file_handling.ImageExporter(main).save()
+
+
+HEADLESS = dict(
+    model_open=model_open,
+    model_import=model_import,
+    model_drag=model_drag,
+    model_resize=model_resize,
+    model_save=model_save,
+    model_export=model_export,
+)
+GUI = dict(
+    gui_construct=gui_construct,
+    gui_open=gui_open,
+    gui_drag=gui_drag,
+    gui_resize=gui_resize,
+    gui_save=gui_save,
+    gui_export=gui_export,
+)
+
+
+def run_case(name, album):
+    """ run a case and measure it, runs in a fresh process """
+    workdir = mkdtemp(prefix='photon-benchmark-')
+    isolate(workdir)
+
+    case = {**HEADLESS, **GUI}[name]
+    start = perf_counter()
+    latencies = case(album, workdir) or []
+    wall = perf_counter() - start
+
+    return dict(wall_s=wall, peak_rss_mb=peak_rss_mb(), events=len(latencies), latency_ms=percentiles(latencies))
+
+
+def compare(results, baseline, tolerance):
+    """ the cases whose wall time or p99 latency grew by more than the tolerance relative to the baseline """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+
+        before = baseline[key]
+        pairs = [('wall_s', result['wall_s'], before['wall_s'])]
+        if 'p99' in result['latency_ms'] and 'p99' in before.get('latency_ms', {}):
+            pairs.append(('p99_ms', result['latency_ms']['p99'], before['latency_ms']['p99']))
+
+        for metric, now, then in pairs:
+            if then and now > then * (1 + tolerance):
+                regressions.append(f'{key} {metric}: {then:.4f} -> {now:.4f} ({now / then - 1:+.0%})')
+
+    return regressions
+
+
+def main(argv=None):
+    parser = ArgumentParser(description='benchmark the hot paths of photon')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='the number of photos per album')
+    parser.add_argument('--resolution', type=int, nargs=2, default=list(RESOLUTION), help='the size of the photos')
+    parser.add_argument('--cases', nargs='+', help='the cases to run, all by default')
+    parser.add_argument('--data', default=str(DATA), help='where the synthetic albums are kept')
+    parser.add_argument('--output', default='benchmark.json', help='the json file the results are written to')
+    parser.add_argument('--baseline', help='a json file of earlier results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='the allowed slowdown relative to the baseline')
+    args = parser.parse_args(argv)
+
+    cases = args.cases or list(HEADLESS) + (list(GUI) if has_display() else [])
+    if not has_display() and not args.cases:
+        print('no display, skipping the gui cases. Run under xvfb-run to include them.')
+
+    makedirs(args.data, exist_ok=True)
+    context = get_context('spawn')
+    results = {}
+
+    for n in args.sizes:
+        album = generate(args.data, n, tuple(args.resolution))
+
+        for name in cases:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_case, (name, album))
+
+            results[f'{name}@{n}'] = result
+            print(f'{name}@{n}: {result["wall_s"]:.3f} s, {result["peak_rss_mb"]:.0f} MB, {result["latency_ms"]}')
+
+    with open(args.output, 'w') as f:
+        f.write(json.dumps(dict(
+            meta=dict(python=python_version(), platform=platform(), resolution=args.resolution),
+            results=results,
+        ), indent=2))
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.loads(f.read())['results'], args.tolerance)
+
+        print('\n'.join(regressions) or 'no regressions')
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Tests of the reading and writing of albums and packed albums
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from os.path import join
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+from zipfile import ZipFile
+from PIL import Image
+
+from handlers.album_pack import read_album, write_album, read_source, split, PackedAlbum, LAYOUT
+from handlers.proxy_cache import proxy_cache
+
+
+def placement(image, x=0):
+    """ a placement as it is stored in an album """
+    return {'uid': f'{image}-{x}', 'image': image, 'location': [x, 0], 'size': [100, 75], 'angle': 0, 'page': 0}
+
+
+class PackedAlbumTest(TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        # the proxies are cached in the temporary directory, rather than in that of the user
+        cached = proxy_cache.directory
+        proxy_cache.directory = Path(self.directory, 'proxies')
+        self.addCleanup(setattr, proxy_cache, 'directory', cached)
+
+        self.red = self.image('red.jpg', 'red')
+        self.blue = self.image('blue.png', 'blue')
+
+    def image(self, name, colour):
+        path = join(self.directory, name)
+        Image.new('RGB', (400, 300), colour).save(path)
+        return path
+
+    def test_an_album_round_trips(self):
+        path = join(self.directory, 'album.hv')
+        content = [placement(self.red), placement(self.blue, x=120)]
+
+        write_album(path, content)
+
+        self.assertEqual(read_album(path), content)
+
+    def test_a_packed_album_holds_its_images(self):
+        path = join(self.directory, 'album.hvz')
+        write_album(path, [placement(self.red), placement(self.blue, x=120)])
+
+        content = read_album(path)
+
+        self.assertEqual([c['location'] for c in content], [[0, 0], [120, 0]])
+        self.assertEqual([split(c['image'])[0] for c in content], [path, path])
+        self.assertEqual(read_source(content[0]['image']), read_source(self.red))
+        self.assertEqual(read_source(content[1]['image']), read_source(self.blue))
+
+    def test_identical_images_are_stored_once(self):
+        path = join(self.directory, 'album.hvz')
+        write_album(path, [placement(self.red), placement(self.red, x=120)])
+
+        content = read_album(path)
+
+        self.assertEqual(content[0]['image'], content[1]['image'])
+        with ZipFile(path) as z:
+            self.assertEqual(sorted(n.partition('/')[0] for n in z.namelist()), [LAYOUT, 'proxies', 'sources'])
+
+    def test_the_proxies_of_a_packed_image_are_read_from_the_album(self):
+        path = join(self.directory, 'album.hvz')
+        write_album(path, [placement(self.red)])
+
+        _, member = split(read_album(path)[0]['image'])
+        proxies = PackedAlbum.open(path).proxies(member)
+
+        self.assertEqual(proxies.source_size, (400, 300))
+        self.assertGreater(proxies.level_for((400, 300)).getpixel((200, 150))[0], 200)
+
+    def test_a_packed_album_can_be_packed_again(self):
+        # e.g. when it is saved as another packed album, its images are read from the album it is in
+        first, second = join(self.directory, 'first.hvz'), join(self.directory, 'second.hvz')
+        write_album(first, [placement(self.red), placement(self.blue, x=120)])
+        write_album(second, read_album(first))
+
+        content = read_album(second)
+
+        self.assertEqual([split(c['image'])[0] for c in content], [second, second])
+        self.assertEqual(read_source(content[1]['image']), read_source(self.blue))
+
+    def test_writing_over_an_open_album_replaces_it(self):
+        path = join(self.directory, 'album.hvz')
+        write_album(path, [placement(self.red)])
+        PackedAlbum.open(path)
+
+        write_album(path, [placement(self.blue)])
+
+        self.assertEqual(read_source(read_album(path)[0]['image']), read_source(self.blue))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Tests of the replay of journaled edits onto an album
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from unittest import TestCase, main
+
+from base.album import Album
+from handlers.journal import replay
+
+
+def placement(image, uid=None, x=0):
+    """ a placement as it is stored in an album, without an id if none is given """
+    return {**({'uid': uid} if uid else {}), 'image': image, 'location': [x, 0], 'size': [100, 100], 'angle': 0}
+
+
+class ReplayTest(TestCase):
+    def test_records_are_applied_by_id(self):
+        content = [placement('a.jpg', 'a'), placement('b.jpg', 'b')]
+        records = [
+            {'op': 'transform', **placement('a.jpg', 'a', x=50)},
+            {'op': 'delete', **placement('b.jpg', 'b')},
+            {'op': 'place', **placement('c.jpg', 'c')},
+        ]
+
+        replayed = replay(content, records)
+
+        self.assertEqual([c['uid'] for c in replayed], ['a', 'c'])
+        self.assertEqual(replayed[0]['location'], [50, 0])
+
+    def test_replaying_twice_has_no_further_effect(self):
+        content = [placement('a.jpg', 'a')]
+        records = [{'op': 'place', **placement('b.jpg', 'b')}, {'op': 'transform', **placement('a.jpg', 'a', x=50)}]
+
+        self.assertEqual(replay(content, records), replay(replay(content, records), records))
+
+    def test_album_without_ids_keeps_untouched_placements(self):
+        # ids of placements saved without one are their position in the album, an edit must not shift them
+        content = [placement('a.jpg'), placement('b.jpg'), placement('c.jpg')]
+        records = [{'op': 'transform', **placement('b.jpg', '1', x=50)}, {'op': 'delete', **placement('a.jpg', '0')}]
+
+        replayed = replay(content, records)
+
+        self.assertEqual([(c['uid'], c['image']) for c in replayed], [('1', 'b.jpg'), ('2', 'c.jpg')])
+        self.assertEqual(sorted(p.source for p in Album.from_content(replayed)), ['b.jpg', 'c.jpg'])
+
+
+if __name__ == '__main__':
+    main()
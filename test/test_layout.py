@@ -0,0 +1,89 @@
+"""
+Tests of the layout of photos on the pages of an album
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from unittest import TestCase, main
+
+from base.album import Album, Placement
+from handlers.compositor import scene
+from handlers.layout import justified, paginate, layout, MARGIN, SPACING, PAGE_GAP
+
+
+class PaginateTest(TestCase):
+    def test_rows_that_do_not_fit_start_a_new_page(self):
+        rows = [[(k, 0, 100, 100)] for k in range(5)]
+
+        placements = paginate(rows, page_size=(400, 2 * MARGIN + 2 * 100 + SPACING))
+
+        self.assertEqual([page for _, page, *_ in placements], [0, 0, 1, 1, 2])
+        self.assertEqual([y for _, _, _, y, _, _ in placements][:3], [MARGIN, MARGIN + 100 + SPACING, MARGIN])
+
+    def test_a_row_taller_than_a_page_gets_a_page_of_its_own(self):
+        rows = [[(0, 0, 100, 100)], [(1, 0, 100, 1000)], [(2, 0, 100, 100)]]
+
+        placements = paginate(rows, page_size=(400, 400))
+
+        self.assertEqual([page for _, page, *_ in placements], [0, 1, 2])
+
+    def test_images_are_placed_inside_the_margin(self):
+        placements = paginate([[(0, 0, 100, 100), (1, 112, 100, 100)]])
+
+        self.assertEqual([(x, y) for _, _, x, y, _, _ in placements], [(MARGIN, MARGIN), (MARGIN + 112, MARGIN)])
+
+
+class JustifiedTest(TestCase):
+    def test_full_rows_fill_the_width(self):
+        rows = justified([(300, 200)] * 10, 1000)
+
+        for row in rows[:-1]:
+            _, x, w, _ = row[-1]
+            self.assertEqual(x + w, 1000)
+
+    def test_every_image_is_placed_once_in_order(self):
+        rows = justified([(300, 200), (200, 300), (400, 100)] * 5, 1000)
+
+        self.assertEqual([k for row in rows for k, *_ in row], list(range(15)))
+
+
+class LayoutTest(TestCase):
+    def test_pages_are_stacked_from_the_origin(self):
+        # a page holds a single row of the grid
+        page_size = (400, 2 * MARGIN + 100)
+        bounds, pages, frames = layout([(100, 100)] * 6, 'grid', origin=(10, 20), page_size=page_size)
+
+        top = 20 + page_size[1] + PAGE_GAP
+        self.assertEqual(pages, [0, 0, 0, 0, 1, 1])
+        self.assertEqual(frames, [(10, 20, 410, 20 + page_size[1]), (10, top, 410, top + page_size[1])])
+        self.assertEqual(bounds[4][1], top + MARGIN)
+
+    def test_every_image_lies_within_the_frame_of_its_page(self):
+        sizes = [(300, 200), (200, 300)] * 40
+        bounds, pages, frames = layout(sizes)
+
+        self.assertGreater(len(frames), 1)
+        for (x, y, w, h), page in zip(bounds, pages):
+            l, t, r, b = frames[page]
+            self.assertTrue(l <= x and t <= y and x + w <= r and y + h <= b)
+
+
+class FrameTest(TestCase):
+    def test_pages_that_were_laid_out_are_exported_at_the_size_of_their_frame(self):
+        album = Album.from_content([
+            {'image': 'a.jpg', 'location': [50, 50], 'size': [100, 100], 'page': 0, 'frame': [0, 0, 400, 300]},
+            {'image': 'b.jpg', 'location': [50, 50], 'size': [100, 100], 'page': 1},
+        ])
+
+        self.assertEqual(scene(album.pages[0])[1], (0, 0, 400, 300))
+        self.assertEqual(scene(album.pages[1])[1], (50, 50, 150, 150))
+
+    def test_the_frame_is_stored_with_the_placement(self):
+        placement = Placement('a.jpg', 0, 0, 10, 10, frame=(0, 0, 400, 300))
+
+        self.assertEqual(Placement.from_dict(placement.to_dict()).frame, (0, 0, 400, 300))
+        self.assertNotIn('frame', Placement('a.jpg', 0, 0, 10, 10).to_dict())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Tests of the serialization of proxy pyramids
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+from PIL import Image, ImageChops
+
+from handlers.image_handling import ProxyPyramid
+from handlers.proxy_cache import pack_pyramid, unpack_pyramid, register, source_key, RAW_LEVEL, HEADER, MAGIC
+
+
+def pyramid(mode='RGB'):
+    """ a pyramid of a gradient, smooth enough to survive compression with little loss """
+    gradient = Image.linear_gradient('L').resize((400, 300))
+    image = Image.merge('RGB', (gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT), gradient)).convert(mode)
+    return ProxyPyramid((800, 600), [image.resize((40, 30)), image.resize((200, 150)), image])
+
+
+class PackTest(TestCase):
+    def test_round_trip_keeps_the_sizes_of_the_levels(self):
+        unpacked = unpack_pyramid(pack_pyramid(pyramid()))
+
+        self.assertEqual(unpacked.source_size, (800, 600))
+        self.assertEqual(unpacked.sizes, [(40, 30), (200, 150), (400, 300)])
+        self.assertEqual([unpacked.level(i).size for i in range(3)], unpacked.sizes)
+
+    def test_levels_stay_compressed_until_they_are_needed(self):
+        original = pyramid()
+        unpacked = unpack_pyramid(pack_pyramid(original))
+
+        self.assertTrue(all(isinstance(level, bytes) for level in unpacked.levels))
+        self.assertLess(unpacked.nbytes, original.nbytes / 4)
+
+    def test_lossy_levels_are_close_to_the_original(self):
+        level = unpack_pyramid(pack_pyramid(pyramid())).level(2)
+        difference = ImageChops.difference(level, pyramid().levels[2]).getextrema()
+
+        self.assertLess(max(high for _, high in difference), 16)
+
+    def test_transparent_levels_are_lossless(self):
+        original = pyramid('RGBA')
+        level = unpack_pyramid(pack_pyramid(original)).level(2)
+
+        self.assertEqual(level.mode, 'RGBA')
+        self.assertEqual(level.tobytes(), original.levels[2].tobytes())
+
+    def test_packing_an_unpacked_pyramid_does_not_compress_it_again(self):
+        packed = pack_pyramid(pyramid())
+        self.assertEqual(pack_pyramid(unpack_pyramid(packed)), packed)
+
+    def test_raw_pyramids_of_version_1_are_read(self):
+        # packed albums written before the levels were compressed hold raw pixel data
+        levels = pyramid().levels
+        offset = HEADER.size + RAW_LEVEL.size * len(levels)
+        header = [HEADER.pack(MAGIC, 1, 800, 600, len(levels))]
+        for level in levels:
+            header.append(RAW_LEVEL.pack(b'RGB ', *level.size, offset))
+            offset += len(level.tobytes())
+        data = b''.join(header + [level.tobytes() for level in levels])
+
+        unpacked = unpack_pyramid(memoryview(data))
+
+        self.assertEqual(unpacked.level(1).tobytes(), levels[1].tobytes())
+        self.assertEqual(unpacked.level_for((300, 100)).size, (400, 300))
+
+    def test_other_data_is_rejected(self):
+        with self.assertRaises(ValueError):
+            unpack_pyramid(b'\0' * HEADER.size)
+
+
+class SourceKeyTest(TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, data):
+        path = join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_exact_duplicates_share_their_key(self):
+        a, b = self.write('a.jpg', b'same'), self.write('b.jpg', b'same')
+        register([a, b])
+
+        self.assertEqual(source_key(a), source_key(b))
+
+    def test_files_of_another_size_are_keyed_by_their_identity(self):
+        a, b = self.write('a.jpg', b'one'), self.write('b.jpg', b'other')
+        register([a, b])
+
+        self.assertNotEqual(source_key(a), source_key(b))
+        self.assertTrue(source_key(a).startswith(a))
+
+    def test_files_of_the_same_size_with_other_content_do_not_share_their_key(self):
+        a, b = self.write('a.jpg', b'same'), self.write('b.jpg', b'diff')
+        register([a, b])
+
+        self.assertNotEqual(source_key(a), source_key(b))
+
+    def test_registering_a_file_twice_does_not_make_it_its_own_duplicate(self):
+        a = self.write('a.jpg', b'a unique size of content')
+        register([a, a])
+
+        self.assertTrue(source_key(a).startswith(a))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Tests of the uniform grid spatial index
+
+author: David den Uyl (djdenuyl@gmail.com)
+date: 2026-10-18
+"""
+from unittest import TestCase, main
+
+from base.spatial_index import SpatialIndex
+
+
+class SpatialIndexTest(TestCase):
+    def setUp(self):
+        self.index = SpatialIndex(cell=100)
+
+    def test_a_box_is_stored_in_every_cell_it_overlaps(self):
+        self.index.insert('a', (50, 50, 150, 250))
+
+        self.assertEqual(set(self.index._cells), {(0, 0), (1, 0), (0, 1), (1, 1), (0, 2), (1, 2)})
+
+    def test_boxes_on_a_cell_boundary_are_found_from_both_cells(self):
+        self.index.insert('a', (0, 0, 100, 100))
+
+        self.assertEqual(self.index.query_point(100, 100), {'a'})
+        self.assertEqual(self.index.query_point(99.5, 0), {'a'})
+        self.assertEqual(self.index.query_rect(100, 100, 150, 150), {'a'})
+        self.assertEqual(self.index.query_point(100.5, 100), set())
+
+    def test_negative_coordinates_fall_in_their_own_cells(self):
+        self.index.insert('a', (-150, -50, -120, -10))
+
+        self.assertEqual(set(self.index._cells), {(-2, -1)})
+        self.assertEqual(self.index.query_point(-130, -20), {'a'})
+        self.assertEqual(self.index.query_rect(0, 0, 10, 10), set())
+
+    def test_queries_only_return_overlapping_boxes(self):
+        self.index.insert('a', (10, 10, 20, 20))
+        self.index.insert('b', (30, 30, 40, 40))
+
+        self.assertEqual(self.index.query_rect(15, 15, 25, 25), {'a'})
+        self.assertEqual(self.index.query_point(35, 35), {'b'})
+        self.assertEqual(self.index.query_point(25, 25), set())
+
+    def test_removed_keys_leave_no_cells_behind(self):
+        self.index.insert('a', (50, 50, 250, 250))
+        self.index.remove('a')
+        self.index.remove('a')
+
+        self.assertNotIn('a', self.index)
+        self.assertEqual(len(self.index._cells), 0)
+        self.assertEqual(self.index.query_rect(0, 0, 300, 300), set())
+
+    def test_updates_reindex_the_cells_that_are_left_and_entered(self):
+        self.index.insert('a', (10, 10, 20, 20))
+        self.index.update('a', (210, 10, 220, 20))
+
+        self.assertEqual(set(self.index._cells), {(2, 0)})
+        self.assertEqual(self.index.query_point(15, 15), set())
+        self.assertEqual(self.index.query_point(215, 15), {'a'})
+        self.assertEqual(self.index.bounds('a'), (210, 10, 220, 20))
+
+    def test_moves_follow_the_box(self):
+        self.index.insert('a', (90, 90, 110, 110))
+        self.index.move('a', 100, 0)
+
+        self.assertEqual(self.index.bounds('a'), (190, 90, 210, 110))
+        self.assertEqual(set(self.index._cells), {(1, 0), (2, 0), (1, 1), (2, 1)})
+        self.assertEqual(self.index.query_point(100, 100), set())
+
+    def test_updating_an_unknown_key_inserts_it(self):
+        self.index.update('a', (0, 0, 10, 10))
+        self.index.move('b', 10, 10)
+
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index.query_point(5, 5), {'a'})
+
+    def test_inserting_a_key_again_replaces_its_box(self):
+        self.index.insert('a', (0, 0, 10, 10))
+        self.index.insert('a', (300, 300, 310, 310))
+
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(set(self.index._cells), {(3, 3)})
+
+
+if __name__ == '__main__':
+    main()